@@ -0,0 +1,48 @@
+"""Compare generating and pricing shopping lists one by one with
+ShoppingList.refresh against generate_batch.
+
+Usage: python benchmarks/batch_generation.py [lists] [list_size]
+"""
+import sys
+import time
+
+from shoppinglistapp.core.batch import generate_batch, numpy
+from shoppinglistapp.core.items import Item, ItemPool
+from shoppinglistapp.core.shoppinglist import ShoppingList
+
+
+def one_by_one(item_pool, count, size):
+    """Refresh a ShoppingList count times and sum every list."""
+    shopping_list = ShoppingList()
+    totals = []
+    for _ in range(count):
+        shopping_list.refresh(item_pool, size)
+        totals.append(shopping_list.get_total_cents())
+    return totals
+
+
+def batched(item_pool, count, size, use_numpy):
+    """Generate count lists in one batch and sum them in one pass."""
+    return generate_batch(item_pool, count, size, seed=1,
+                          use_numpy=use_numpy).totals()
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    POOL = ItemPool()
+    for i in range(100_000):
+        POOL.add_item(Item(f'item{i}', 1 + i % 500 / 7))
+    RUNS = [('refresh loop', lambda: one_by_one(POOL, COUNT, SIZE)),
+            ('batch (python)', lambda: batched(POOL, COUNT, SIZE, False))]
+    if numpy is not None:
+        RUNS.append(('batch (numpy)',
+                     lambda: batched(POOL, COUNT, SIZE, True)))
+    print(f'{COUNT} lists of {SIZE} items from a pool of '
+          f'{POOL.get_size()} items')
+    for label, run in RUNS:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f'{label:>15}: {elapsed:.2f}s '
+              f'({elapsed / COUNT * 1e6:.2f} us/list)')
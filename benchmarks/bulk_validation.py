@@ -0,0 +1,40 @@
+"""Compare validating catalog rows one Item at a time, catching the
+exceptions, with the bulk validation of validate_items.
+
+Usage: python benchmarks/bulk_validation.py [rows] [bad_ratio]
+"""
+import random
+import sys
+import time
+
+from shoppinglistapp.core.errors import InvalidItemNameError,\
+    InvalidItemPriceError
+from shoppinglistapp.core.items import Item
+from shoppinglistapp.core.validation import validate_items
+
+
+def one_by_one(pairs):
+    """Build every Item and keep the messages of the rejected rows."""
+    errors = []
+    for row, (name, price) in enumerate(pairs):
+        try:
+            Item(name, price)
+        except (InvalidItemNameError, InvalidItemPriceError) as error:
+            errors.append((row, str(error)))
+    return errors
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    BAD = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    RNG = random.Random(1)
+    PAIRS = [(f'item{i}', -1.0 if RNG.random() < BAD else 1 + i % 500 / 7)
+             for i in range(COUNT)]
+    print(f'{COUNT} rows, {BAD:.0%} invalid')
+    for label, run in (('one by one', lambda: one_by_one(PAIRS)),
+                       ('bulk', lambda: validate_items(PAIRS))):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f'{label:>10}: {elapsed:.2f}s '
+              f'({elapsed / COUNT * 1e9:.0f} ns/row)')
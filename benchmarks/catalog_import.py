@@ -0,0 +1,40 @@
+"""Compare the sequential catalog import with the parallel chunked
+import from 1 to N worker processes.
+
+Usage: python benchmarks/catalog_import.py [items] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from shoppinglistapp.core.items import ItemPool
+from shoppinglistapp.core.parallel import import_catalog
+
+
+def timed(label, run, size):
+    """Run an import and report its throughput."""
+    start = time.perf_counter()
+    report = run()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>12}: {elapsed:.2f}s ({size / elapsed / 1e6:.1f} MB/s, '
+          f'{report.loaded} items, {report.rejected} rejected)')
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    MAX_WORKERS = (int(sys.argv[2]) if len(sys.argv) > 2
+                   else os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as directory:
+        PATH = os.path.join(directory, 'catalog.csv')
+        with open(PATH, 'w', encoding='utf-8') as catalog:
+            catalog.write('name,price\n')
+            for i in range(COUNT):
+                catalog.write(f'item{i},{1 + i % 500 / 7:.2f}\n')
+        SIZE = os.path.getsize(PATH)
+        print(f'{COUNT} rows, {SIZE / 1e6:.0f} MB, {os.cpu_count()} CPUs')
+        timed('sequential', lambda: ItemPool().import_catalog(PATH), SIZE)
+        for workers in range(1, MAX_WORKERS + 1):
+            timed(f'{workers} workers',
+                  lambda: import_catalog(ItemPool(), PATH,
+                                         workers=workers), SIZE)
@@ -0,0 +1,54 @@
+"""Measure the disk backed item pool: lookup latency and cache hit rate
+for several cache sizes under a skewed access pattern, and a full scan.
+
+Usage: python benchmarks/disk_pool_cache.py [items] [lookups]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from shoppinglistapp.core.diskpool import DiskItemPool
+
+CACHE_SIZES = [64 << 10, 1 << 20, 16 << 20, 64 << 20]
+
+
+def skewed_lookups(pool, names, count, seed=0):
+    """Look up count names, most of them among the first ones."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        pool.items[names[int(len(names) * rng.random() ** 3)]]
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    LOOKUPS = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    NAMES = [f'item{i}' for i in range(COUNT)]
+    with tempfile.TemporaryDirectory() as directory:
+        PATH = os.path.join(directory, 'pool')
+        START = time.perf_counter()
+        POOL = DiskItemPool(PATH)
+        POOL.add_items((name, 1 + i % 500 / 7)
+                       for i, name in enumerate(NAMES))
+        POOL.close()
+        ELAPSED = time.perf_counter() - START
+        print(f'{"add_items":>16}: {ELAPSED / COUNT * 1e6:8.1f} us/item')
+        for cache_bytes in CACHE_SIZES:
+            POOL = DiskItemPool(PATH, cache_bytes=cache_bytes)
+            START = time.perf_counter()
+            skewed_lookups(POOL, NAMES, LOOKUPS)
+            ELAPSED = time.perf_counter() - START
+            STATS = POOL.cache.stats()
+            HIT_RATE = STATS['hits'] / (STATS['hits'] + STATS['misses'])
+            print(f'{cache_bytes >> 10:>10} KiB: '
+                  f'{ELAPSED / LOOKUPS * 1e6:8.1f} us/lookup, '
+                  f'{HIT_RATE:6.1%} hits, {STATS["bytes"] >> 10} KiB used')
+            POOL.close()
+        POOL = DiskItemPool(PATH, cache_bytes=CACHE_SIZES[0])
+        START = time.perf_counter()
+        SCANNED = sum(1 for _ in POOL.iter_items())
+        ELAPSED = time.perf_counter() - START
+        print(f'{"iter_items":>16}: {ELAPSED / SCANNED * 1e6:8.1f} us/item, '
+              f'{POOL.cache.stats()["entries"]} pages cached')
+        POOL.close()
@@ -0,0 +1,38 @@
+"""Compare the memory used by ItemPool and ColumnarItemPool.
+
+Usage: python benchmarks/item_pool_memory.py [number_of_items]
+"""
+import sys
+import time
+import tracemalloc
+
+from shoppinglistapp.core.items import Item, ItemPool
+from shoppinglistapp.core.columnar import ColumnarItemPool
+
+
+def item_name(i):
+    """Return a unique alphabetic item name for the given number."""
+    return 'item' + ''.join(chr(97 + int(digit)) for digit in str(i))
+
+
+def measure(pool_class, size):
+    """Fill a pool with size items and return (bytes, seconds)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    pool = pool_class()
+    for i in range(size):
+        pool.add_item(Item(item_name(i), 1 + i % 1000 / 7))
+    elapsed = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert pool.get_size() == size
+    return used, elapsed
+
+
+if __name__ == '__main__':
+    SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f'{SIZE} items')
+    for cls in (ItemPool, ColumnarItemPool):
+        mem, secs = measure(cls, SIZE)
+        print(f'{cls.__name__:>18}: {mem / 2 ** 20:8.1f} MiB '
+              f'({mem / SIZE:6.1f} B/item), built in {secs:.2f}s')
@@ -0,0 +1,79 @@
+"""Measure the mutation log: the latency of logged add_item and
+remove_item calls under group commit, and the time to recover a pool by
+replaying a long log.
+
+Usage: python benchmarks/mutation_log.py [records] [items]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from shoppinglistapp.core.items import Item, ItemPool
+from shoppinglistapp.core.wal import ADD, REMOVE, open_log, pack_record,\
+    replay_log
+
+MUTATIONS = 200_000
+
+
+def name(i):
+    """Return the i-th item name, made of letters only."""
+    return 'item' + ''.join(chr(97 + int(digit)) for digit in str(i))
+
+
+def mutate(pool, count):
+    """Add count items to the pool and remove half of them."""
+    for i in range(count):
+        pool.add_item(Item(name(i), 1 + i % 500 / 7))
+    for i in range(0, count, 2):
+        pool.remove_item(name(i))
+
+
+def write_log(path, records, items):
+    """Write a log of records records that adds items items and then
+    adds and removes the same items over and over."""
+    with open(path, 'wb') as stream:
+        chunk = []
+        for i in range(records):
+            churn, added = divmod(i - items, 2)
+            if i < items:
+                chunk.append(pack_record(ADD, name(i), 1 + i % 500))
+            elif added:
+                chunk.append(pack_record(ADD, name(churn % items), 5))
+            else:
+                chunk.append(pack_record(REMOVE, name(churn % items)))
+            if len(chunk) == 100_000:
+                stream.write(b''.join(chunk))
+                chunk.clear()
+        stream.write(b''.join(chunk))
+
+
+if __name__ == '__main__':
+    RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    ITEMS = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        PATH = os.path.join(directory, 'pool.log')
+        for label, logged in (('no log', False), ('group commit', True)):
+            POOL = ItemPool()
+            LOG = open_log(POOL, PATH) if logged else None
+            START = time.perf_counter()
+            mutate(POOL, MUTATIONS)
+            ELAPSED = time.perf_counter() - START
+            SYNCS = ''
+            if LOG is not None:
+                LOG.close()
+                SYNCS = f', {LOG.syncs} fsyncs'
+            print(f'{label:>14}: {ELAPSED / (1.5 * MUTATIONS) * 1e6:6.2f} '
+                  f'us/mutation{SYNCS}')
+        os.remove(PATH)
+        START = time.perf_counter()
+        write_log(PATH, RECORDS, ITEMS)
+        print(f'{"write log":>14}: {time.perf_counter() - START:6.1f} s, '
+              f'{os.path.getsize(PATH) >> 20} MiB')
+        POOL = ItemPool()
+        START = time.perf_counter()
+        COUNT = replay_log(POOL, PATH)
+        ELAPSED = time.perf_counter() - START
+        print(f'{"replay":>14}: {ELAPSED:6.1f} s for {COUNT} records, '
+              f'{ELAPSED / COUNT * 1e6:.2f} us/record, '
+              f'{POOL.get_size()} items')
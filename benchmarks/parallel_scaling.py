@@ -0,0 +1,31 @@
+"""Measure how generate_parallel scales from 1 to N worker processes.
+
+Usage: python benchmarks/parallel_scaling.py [lists] [list_size] [workers]
+"""
+import os
+import sys
+import time
+
+from shoppinglistapp.core.items import Item, ItemPool
+from shoppinglistapp.core.parallel import price_parallel
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    MAX_WORKERS = (int(sys.argv[3]) if len(sys.argv) > 3
+                   else os.cpu_count() or 1)
+    POOL = ItemPool()
+    for i in range(100_000):
+        POOL.add_item(Item(f'item{i}', 1 + i % 500 / 7))
+    print(f'{COUNT} lists of {SIZE} items from a pool of '
+          f'{POOL.get_size()} items, {os.cpu_count()} CPUs')
+    BASELINE = None
+    for workers in range(1, MAX_WORKERS + 1):
+        start = time.perf_counter()
+        price_parallel(POOL, COUNT, SIZE, seed=1, workers=workers)
+        elapsed = time.perf_counter() - start
+        BASELINE = BASELINE or elapsed
+        print(f'{workers:>3} workers: {elapsed:.2f}s '
+              f'({COUNT / elapsed:,.0f} lists/s, '
+              f'speedup {BASELINE / elapsed:.2f}x)')
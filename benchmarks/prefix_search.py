@@ -0,0 +1,68 @@
+"""Measure prefix search over item names: the radix tree against the
+sorted name index and a scan of every name, for growing catalogs.
+
+Usage: python benchmarks/prefix_search.py [largest catalog] [limit]
+"""
+import random
+import sys
+import time
+from itertools import islice
+
+from shoppinglistapp.core.radix import RadixTree
+from shoppinglistapp.core.sortedindex import SortedNames
+
+QUERIES = 2000
+WORDS = ['apple', 'beef', 'bread', 'cheese', 'milk', 'orange', 'steak',
+         'tea', 'walnut', 'yogurt']
+
+
+def catalog(count, seed=0):
+    """Return count distinct names made of a word and a suffix."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(rng.choice(WORDS) + ''.join(
+            rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(6)))
+    return list(names)
+
+
+def scan(names, prefix, limit):
+    """Return the first limit names starting with prefix, in order, by
+    scanning every name."""
+    return sorted(name for name in names if name.startswith(prefix))[:limit]
+
+
+def timed(search, prefixes):
+    """Return the mean time of a search over the prefixes."""
+    start = time.perf_counter()
+    for prefix in prefixes:
+        search(prefix)
+    return (time.perf_counter() - start) / len(prefixes)
+
+
+if __name__ == '__main__':
+    LARGEST = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    LIMIT = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    SIZE = 10_000
+    while SIZE <= LARGEST:
+        NAMES = catalog(SIZE)
+        RNG = random.Random(1)
+        PREFIXES = [name[:RNG.randint(2, 8)]
+                    for name in RNG.choices(NAMES, k=QUERIES)]
+        START = time.perf_counter()
+        TRIE = RadixTree(NAMES)
+        BUILD = time.perf_counter() - START
+        SORTED = SortedNames(NAMES)
+        TRIE_TIME = timed(
+            lambda prefix: list(islice(TRIE.iter_prefix(prefix), LIMIT)),
+            PREFIXES)
+        SORTED_TIME = timed(
+            lambda prefix: list(islice(SORTED.iter_prefix(prefix), LIMIT)),
+            PREFIXES)
+        SCAN_TIME = timed(lambda prefix: scan(NAMES, prefix, LIMIT),
+                          PREFIXES[:20])
+        print(f'{SIZE:>9} names: trie {TRIE_TIME * 1e6:7.1f} us, '
+              f'sorted index {SORTED_TIME * 1e6:7.1f} us, '
+              f'scan {SCAN_TIME * 1e3:8.2f} ms per search; '
+              f'trie built in {BUILD:.2f} s')
+        SIZE *= 10
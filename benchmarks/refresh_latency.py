@@ -0,0 +1,40 @@
+"""Show that ShoppingList.refresh latency does not grow with the pool.
+
+Usage: python benchmarks/refresh_latency.py [list_size]
+"""
+import random
+import sys
+import timeit
+
+from shoppinglistapp.core.items import Item, ItemPool
+from shoppinglistapp.core.shoppinglist import ShoppingList
+
+
+def build_pool(size):
+    """Return an ItemPool with size items."""
+    pool = ItemPool()
+    for i in range(size):
+        pool.add_item(Item(f'item{i}', 1 + i % 100))
+    return pool
+
+
+def copy_then_sample(pool, sample_size):
+    """Sample the way ItemPool.sample_items used to, for reference."""
+    return random.sample(list(pool.items.values()), sample_size)
+
+
+if __name__ == '__main__':
+    LIST_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    shopping_list = ShoppingList()
+    print(f'{"pool size":>10} {"refresh":>12} {"copy+sample":>12}')
+    for pool_size in (1_000, 10_000, 100_000, 1_000_000):
+        item_pool = build_pool(pool_size)
+        runs = 2000
+        refresh = timeit.timeit(
+            lambda: shopping_list.refresh(item_pool, LIST_SIZE),
+            number=runs) / runs
+        copy = timeit.timeit(
+            lambda: copy_then_sample(item_pool, LIST_SIZE),
+            number=20) / 20
+        print(f'{pool_size:>10} {refresh * 1e6:>10.1f}us '
+              f'{copy * 1e6:>10.1f}us')
@@ -0,0 +1,53 @@
+"""Measure the per-row cost of rendering item prices.
+
+The legacy functions redo what Item.get_order and Item.get_price_str
+did before the order was precomputed and the templates were cached.
+
+Usage: python benchmarks/render_rows.py [number_of_rows]
+"""
+import math
+import sys
+import time
+
+from shoppinglistapp.core.items import Item
+
+
+def legacy_order(item):
+    """Return the price order the way Item.get_order used to."""
+    return math.floor(round(math.log(item.price, 10), 10))
+
+
+def legacy_price_str(item, order=None):
+    """Return the price string the way Item.get_price_str used to."""
+    if order is None:
+        order = legacy_order(item)
+    prc_str = '${:0' + str(order + 4) + '.2f}'
+    return prc_str.format(item.price)
+
+
+def legacy_rows(items):
+    """Render one price per item the old way, scanning for the
+    largest order first."""
+    max_order = max(legacy_order(item) for item in items)
+    return [legacy_price_str(item, max_order) for item in items]
+
+
+def current_rows(items):
+    """Render one price per item with the precomputed order and the
+    cached templates."""
+    max_order = max(item.get_order() for item in items)
+    return [item.get_price_str(order=max_order) for item in items]
+
+
+if __name__ == '__main__':
+    ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    ITEMS = [Item(f'item{i}', 0.01 + i * 37 % 250_000 / 3)
+             for i in range(ROWS)]
+    timings = {}
+    for render in (legacy_rows, current_rows):
+        start = time.perf_counter()
+        render(ITEMS)
+        timings[render.__name__] = time.perf_counter() - start
+        print(f'{render.__name__:>13}: {timings[render.__name__]:.2f}s '
+              f'({timings[render.__name__] / ROWS * 1e9:.0f} ns/row)')
+    print(f'speedup: {timings["legacy_rows"] / timings["current_rows"]:.2f}x')
@@ -0,0 +1,87 @@
+"""Measure the snapshots of an item pool store: how long add and remove
+stall while a snapshot is taken in the background, and the recovery
+time from the latest snapshot and the log tail against a replay of the
+whole history.
+
+Usage: python benchmarks/snapshot_compaction.py [items] [mutations]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from shoppinglistapp.core.items import Item, ItemPool
+from shoppinglistapp.core.store import LOG, ItemPoolStore, store_path
+from shoppinglistapp.core.wal import replay_log
+
+
+def name(i):
+    """Return the i-th item name, made of letters only."""
+    return 'item' + ''.join(chr(97 + int(digit)) for digit in str(i))
+
+
+def churn(item_pool, start, count, latencies=None):
+    """Remove and add back count items, keeping the latency of every
+    mutation in latencies if it is given."""
+    clock = time.perf_counter
+    for i in range(start, start + count):
+        before = clock()
+        item_pool.remove_item(name(i))
+        item_pool.add_item(Item(name(i), 3))
+        if latencies is not None:
+            latencies.append((clock() - before) / 2)
+
+
+def percentile(values, fraction):
+    """Return the value below which fraction of the values are."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    MUTATIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    with tempfile.TemporaryDirectory() as directory:
+        STORE = ItemPoolStore(directory, snapshot_interval=3600)
+        POOL = STORE.open()
+        POOL.add_items((name(i), 1 + i % 500 / 7) for i in range(COUNT))
+        churn(POOL, 0, MUTATIONS)
+        LOGGED = POOL.log.records
+        POOL.log.flush()
+        HISTORY = os.path.join(directory, 'history')
+        shutil.copyfile(store_path(directory, LOG, 0), HISTORY)
+        QUIET = []
+        churn(POOL, 0, 20_000, QUIET)
+        LATENCIES = []
+        SNAPSHOT = threading.Thread(target=STORE.snapshot)
+        START = time.perf_counter()
+        SNAPSHOT.start()
+        DONE = 0
+        while SNAPSHOT.is_alive():
+            churn(POOL, DONE % COUNT, 1000, LATENCIES)
+            DONE += 1000
+        ELAPSED = time.perf_counter() - START
+        print(f'snapshot of {LOGGED} logged mutations: {ELAPSED:.1f} s, '
+              f'log rotation pause {STORE.pauses[-1] * 1e6:.1f} us')
+        for label, values in (('idle', QUIET), ('during snapshot',
+                                                LATENCIES)):
+            print(f'{label:>16}: p50 {percentile(values, 0.5) * 1e6:7.1f}'
+                  f' us, p99 {percentile(values, 0.99) * 1e6:7.1f} us, '
+                  f'max {max(values) * 1e3:6.2f} ms over {len(values)}')
+        STORE.snapshot()
+        churn(POOL, 0, 10_000)
+        STORE.close()
+        START = time.perf_counter()
+        STORE = ItemPoolStore(directory)
+        RECOVERED = STORE.open()
+        ELAPSED = time.perf_counter() - START
+        print(f'recovery from snapshot and 20000 record tail: '
+              f'{ELAPSED:.2f} s, {RECOVERED.get_size()} items')
+        STORE.close()
+        RECOVERED.close()
+        START = time.perf_counter()
+        replay_log(ItemPool(), HISTORY)
+        print(f'replay of the {LOGGED} records before the snapshot: '
+              f'{time.perf_counter() - START:.2f} s')
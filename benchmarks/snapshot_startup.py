@@ -0,0 +1,35 @@
+"""Compare opening an item pool snapshot with rebuilding the pool.
+
+Usage: python benchmarks/snapshot_startup.py [items]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from shoppinglistapp.core.columnar import ColumnarItemPool
+from shoppinglistapp.core.items import Item
+from shoppinglistapp.core.snapshot import SnapshotItemPool, write_snapshot
+
+
+def timed(label, run):
+    """Run and report the elapsed time, returning the result."""
+    start = time.perf_counter()
+    result = run()
+    print(f'{label:>20}: {(time.perf_counter() - start) * 1e3:10.3f} ms')
+    return result
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    POOL = timed('rebuild pool', lambda: ColumnarItemPool(
+        {f'item{i}': Item(f'item{i}', 1 + i % 500 / 7)
+         for i in range(COUNT)}))
+    with tempfile.TemporaryDirectory() as directory:
+        PATH = os.path.join(directory, 'pool.snapshot')
+        timed('write snapshot', lambda: write_snapshot(POOL, PATH))
+        print(f'{COUNT} items, {os.path.getsize(PATH) / 1e6:.1f} MB')
+        SNAPSHOT = timed('open snapshot', lambda: SnapshotItemPool(PATH))
+        timed('first lookup', lambda: SNAPSHOT.items[f'item{COUNT // 2}'])
+        timed('sample 10 items', lambda: SNAPSHOT.sample_items(10))
+        SNAPSHOT.close()
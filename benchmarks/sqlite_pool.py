@@ -0,0 +1,54 @@
+"""Measure the SQLite item pool: single and batched inserts, sampling
+and lookups from several reader threads.
+
+Usage: python benchmarks/sqlite_pool.py [items] [threads]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shoppinglistapp.core.items import Item
+from shoppinglistapp.core.sqlitepool import SQLiteItemPool
+
+
+def timed(label, run, count, unit):
+    """Run and report the time per unit."""
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>24}: {elapsed / count * 1e6:8.1f} us/{unit}')
+
+
+def lookups(pool, names, count):
+    """Look up count random names."""
+    rng = random.Random()
+    for _ in range(count):
+        pool.items[rng.choice(names)]
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    NAMES = [f'item{i}' for i in range(COUNT)]
+    with tempfile.TemporaryDirectory() as directory:
+        POOL = SQLiteItemPool(os.path.join(directory, 'pool.db'))
+        timed('add_item', lambda: [POOL.add_item(Item(f'single{i}', 1))
+                                   for i in range(2000)], 2000, 'item')
+        timed('add_items (executemany)',
+              lambda: POOL.add_items((name, 1 + i % 500 / 7)
+                                     for i, name in enumerate(NAMES)),
+              COUNT, 'item')
+        timed('sample_items(10)', lambda: [POOL.sample_items(10)
+                                           for _ in range(1000)],
+              1000, 'sample')
+        timed('lookup, 1 thread', lambda: lookups(POOL, NAMES, 20_000),
+              20_000, 'lookup')
+        with ThreadPoolExecutor(THREADS) as executor:
+            timed(f'lookup, {THREADS} threads',
+                  lambda: list(executor.map(
+                      lambda _: lookups(POOL, NAMES, 20_000 // THREADS),
+                      range(THREADS))), 20_000, 'lookup')
+        POOL.close()
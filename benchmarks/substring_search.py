@@ -0,0 +1,70 @@
+"""Measure substring search over item names: the trigram index against
+a scan of every name, for growing catalogs, with selective queries
+(pieces of existing names) and a common word.
+
+Usage: python benchmarks/substring_search.py [largest catalog]
+"""
+import random
+import statistics
+import sys
+import time
+
+from shoppinglistapp.core.ngram import TrigramIndex
+
+QUERIES = 500
+WORDS = ['Apple', 'Beef', 'Bread', 'Cheese', 'Milk', 'Orange', 'Steak',
+         'Tea', 'Walnut', 'Yogurt']
+
+
+def catalog(count, seed=0):
+    """Return count distinct names made of a word and a suffix."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(rng.choice(WORDS) + ' ' + ''.join(
+            rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(6)))
+    return list(names)
+
+
+def scan(names, text):
+    """Return the names containing text, ignoring case, by scanning
+    every name."""
+    folded = text.casefold()
+    return [name for name in names if folded in name.casefold()]
+
+
+def timed(search, queries):
+    """Return the median and the mean time of a search over the
+    queries."""
+    times = []
+    for text in queries:
+        start = time.perf_counter()
+        search(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), statistics.fmean(times)
+
+
+if __name__ == '__main__':
+    LARGEST = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    SIZE = 10_000
+    while SIZE <= LARGEST:
+        NAMES = catalog(SIZE)
+        RNG = random.Random(1)
+        SELECTIVE = []
+        for name in RNG.choices(NAMES, k=QUERIES):
+            start = RNG.randrange(len(name) - 4)
+            SELECTIVE.append(name[start:start + 4])
+        START = time.perf_counter()
+        INDEX = TrigramIndex(NAMES)
+        BUILD = time.perf_counter() - START
+        print(f'{SIZE:>9} names: index built in {BUILD:.2f} s, '
+              f'{INDEX.posting_bytes() / SIZE:.1f} posting bytes per name')
+        for label, queries in (('selective', SELECTIVE),
+                               ('"steak"', ['steak'] * 5)):
+            MEDIAN, MEAN = timed(lambda text: list(INDEX.search(text)),
+                                 queries)
+            _, SCANNED = timed(lambda text: scan(NAMES, text), queries[:5])
+            print(f'{label:>20}: index median {MEDIAN * 1e3:8.3f} ms, '
+                  f'mean {MEAN * 1e3:8.3f} ms; scan {SCANNED * 1e3:8.3f} '
+                  f'ms per query')
+        SIZE *= 10
@@ -0,0 +1,37 @@
+"""Compare the checked and trusted constructors of Item and ItemPool.
+
+Usage: python benchmarks/trusted_constructors.py [items]
+"""
+import sys
+import time
+
+from shoppinglistapp.core.columnar import ColumnarItemPool
+from shoppinglistapp.core.items import Item, ItemPool
+
+
+def timed(label, run, count):
+    """Run and report the time per item."""
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>32}: {elapsed / count * 1e9:6.0f} ns/item')
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    NAMES = [f'item{i}' for i in range(COUNT)]
+    CENTS = [100 + i % 50_000 for i in range(COUNT)]
+    PRICES = [cents / 100 for cents in CENTS]
+    ITEMS = {name: Item.trusted(name, cents)
+             for name, cents in zip(NAMES, CENTS)}
+    timed('Item(name, price)',
+          lambda: list(map(Item, NAMES, PRICES)), COUNT)
+    timed('Item.from_cents(name, cents)',
+          lambda: list(map(Item.from_cents, NAMES, CENTS)), COUNT)
+    timed('Item.trusted(name, cents)',
+          lambda: list(map(Item.trusted, NAMES, CENTS)), COUNT)
+    for pool_class in (ItemPool, ColumnarItemPool):
+        timed(f'{pool_class.__name__}(items)',
+              lambda: pool_class(ITEMS), COUNT)
+        timed(f'{pool_class.__name__}.from_validated',
+              lambda: pool_class.from_validated(ITEMS), COUNT)
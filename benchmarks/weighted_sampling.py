@@ -0,0 +1,52 @@
+"""Compare weighted sampling without replacement through the Fenwick
+tree of WeightedSampler against a scan of the cumulative weights.
+
+Usage: python benchmarks/weighted_sampling.py [pool_size] [samples] [k]
+"""
+import random
+import sys
+import time
+from bisect import bisect_right
+from itertools import accumulate
+
+from shoppinglistapp.core.sampling import WeightedSampler
+
+
+def naive_sample(keys, weights, sample_size, rng):
+    """Draw sample_size distinct keys by rebuilding the cumulative
+    weights after every draw."""
+    weights = list(weights)
+    drawn = []
+    for _ in range(sample_size):
+        running = list(accumulate(weights))
+        pos = bisect_right(running, rng.random() * running[-1])
+        drawn.append(keys[pos])
+        weights[pos] = 0
+    return drawn
+
+
+def timed(label, run, samples):
+    """Call run samples times and report the time per call."""
+    start = time.perf_counter()
+    for _ in range(samples):
+        run()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>16}: {elapsed / samples * 1e6:,.1f} us/call')
+
+
+if __name__ == '__main__':
+    SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    SAMPLES = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    K = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    RNG = random.Random(1)
+    KEYS = [f'item{i}' for i in range(SIZE)]
+    WEIGHTS = [RNG.paretovariate(1.5) for _ in range(SIZE)]
+    print(f'{SAMPLES} samples of {K} items from {SIZE} weighted items')
+    START = time.perf_counter()
+    SAMPLER = WeightedSampler(zip(KEYS, WEIGHTS))
+    print(f'{"sampler build":>16}: {time.perf_counter() - START:.2f}s')
+    timed('cumulative scan',
+          lambda: naive_sample(KEYS, WEIGHTS, K, RNG), SAMPLES)
+    timed('fenwick tree', lambda: SAMPLER.sample(K, RNG), SAMPLES * 1000)
+    timed('reweight', lambda: SAMPLER.set_weight(RNG.choice(KEYS), 2.0),
+          SAMPLES * 1000)
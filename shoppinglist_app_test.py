@@ -1,13 +1,42 @@
 """Testing module for the shoppinglist_app.py module."""
+import io
+import pickle
+import random
+import time
 import pytest
 from core.items import Item, ItemPool
+from core.columnar import ColumnarItemPool
+from core.loaders import LoadReport
+from core.validation import validate_items, NAME_NOT_STRING,\
+    NAME_EMPTY, PRICE_INVALID, DUPLICATE
+from core.snapshot import SnapshotItemPool, write_snapshot
+from core.sqlitepool import SQLiteItemPool
+from core.diskpool import DiskItemPool, PAGE_SIZE
+from core.cache import LRUCache
+from core.wal import open_log, replay_log
+from core.store import ItemPoolStore, store_numbers
+from core.money import MAX_CENTS, to_cents, format_cents
+from core.render import iter_item_lines, iter_list_lines, write_lines
+from core.sortedindex import SortedNames
+from core.radix import RadixTree
+from core.ngram import TrigramIndex, PostingList
+from core.aggregates import MaxCounter
+from core.sampling import WeightedSampler
+from core.batch import generate_batch
+from core.parallel import generate_parallel, price_parallel,\
+    import_catalog
 from core.shoppinglist import ShoppingList
 from core.appengine import AppEngine
+from app_cli import AppCLI
+from core import debug, diskpool, sqlitepool
 from core.errors import InvalidShoppingListSizeError,\
                         InvalidItemPriceError,\
                         InvalidItemNameError,\
                         InvalidItemPoolError,\
                         DuplicateItemError,\
+                        InvalidItemWeightError,\
+                        ReadOnlyItemPoolError,\
+                        InvalidRecordError,\
                         NonExistingItemError
 
 
@@ -24,12 +53,13 @@ def test_app_engine_init():
 def test_app_engine_process_answer():
     """Test the AppEngine class process_answer method."""
     app_engine = AppEngine()
-    app_engine.correct_answer = 1.00
+    app_engine.correct_answer = 100
     app_engine.process_answer('1.00')
     assert app_engine.message == 'Correct!'
-    app_engine.correct_answer = 1.00
+    app_engine.correct_answer = 100
     app_engine.process_answer('abc')
-    app_engine.correct_answer = 1.00
+    assert isinstance(app_engine.message, InvalidItemPriceError)
+    app_engine.correct_answer = 100
     app_engine.process_answer('2.00')
     assert app_engine.message == ('Not Correct!(Expected $1.00)\n'
                                   'You answered $2.00.')
@@ -44,6 +74,9 @@ def test_app_engine_process_add_item():
     app_engine.process_add_item('add orange: 1.00')
     app_engine.process_add_item('add: 1.00')
     app_engine.process_add_item('add : 1.00')
+    app_engine.process_add_item('add fig: 0.004')
+    assert isinstance(app_engine.message, InvalidItemPriceError)
+    assert 'fig' not in app_engine.items.items
 
 
 def test_app_engine_process_del_item():
@@ -55,6 +88,116 @@ def test_app_engine_process_del_item():
     app_engine.process_del_item('del orange')
 
 
+def test_app_engine_process_import(tmp_path):
+    """Test the AppEngine class process_import method."""
+    catalog = tmp_path / 'catalog.csv'
+    catalog.write_text('name,price\norange,1.00\napple,2.5\n')
+    app_engine = AppEngine()
+    app_engine.items = ItemPool()
+    app_engine.process_import(f'import {catalog}')
+    assert app_engine.message == 'Imported 2 items, rejected 0 rows.'
+    app_engine.process_import(f'import {catalog}')
+    assert app_engine.message.startswith('Imported 0 items, rejected 2')
+    app_engine.process_import(f'import {tmp_path / "missing.csv"}')
+    assert app_engine.message.startswith('Cannot import')
+    app_engine.process_import('import ')
+    assert app_engine.message.startswith('Usage')
+    assert app_engine.items.get_size() == 2
+    catalog.write_text('lemon,1\n' + 'x' * 200000 + ',1\nkiwi,2\n')
+    app_engine.process_import(f'import {catalog}')
+    assert app_engine.message.splitlines() == [
+        'Imported 2 items, rejected 1 rows.',
+        "Row 2: Record 'field larger than field limit (131072)' is not a "
+        "name and a price."]
+
+
+def test_item_pool_loaders(tmp_path):
+    """Test the CSV and JSON Lines loaders of the pools."""
+    csv_file = tmp_path / 'catalog.csv'
+    csv_file.write_text('name,price\norange,1\n"Beef, Steak",25.18\n'
+                        'apple,abc\n\nlemon,-1\norange,2\nkiwi\n'
+                        ',3\nmelon,inf\n')
+    jsonl_file = tmp_path / 'catalog.jsonl'
+    jsonl_file.write_text('{"name": "orange", "price": 1}\n'
+                          '{"name": "Beef, Steak", "price": "25.18"}\n'
+                          '{"name": "apple"}\nnot json\n\n'
+                          '{"name": 3, "price": 1}\n')
+    expected = {'orange': Item('orange', 1),
+                'Beef, Steak': Item('Beef, Steak', 25.18)}
+    for pool_class in (ItemPool, ColumnarItemPool):
+        report = LoadReport()
+        pool = pool_class.from_csv(csv_file, report)
+        assert dict(pool.items) == expected
+        assert (report.loaded, report.rejected) == (2, 6)
+        assert list(report.errors.rows) == [4, 6, 7, 8, 9, 10]
+        assert isinstance(report.errors.error(2), DuplicateItemError)
+        assert isinstance(report.errors.error(3), InvalidRecordError)
+        report = LoadReport(max_errors=1)
+        pool = pool_class.from_jsonl(jsonl_file, report)
+        assert dict(pool.items) == expected
+        assert (report.loaded, report.rejected) == (2, 3)
+        assert report.summary().splitlines()[0] == (
+            'Imported 2 items, rejected 3 rows.')
+        assert report.summary().splitlines()[-1] == '... and 2 more.'
+    with pytest.raises(ValueError):
+        ItemPool().import_catalog(tmp_path / 'catalog.txt')
+
+
+def test_validate_items():
+    """Test the bulk validation of (name, price) pairs."""
+    pairs = [('orange', 1), (3, 1), ('', 1), ('apple', 'abc'),
+             ('lemon', -2), ('kiwi', '2.5'), ('orange', 2), ('melon', 1e308),
+             ('fig', 0.001), ('pear', None), ('plum', True)]
+    valid, report = validate_items(pairs, known={'plum'})
+    assert valid == [(0, 'orange', 100), (5, 'kiwi', 250)]
+    assert list(report.rows) == [1, 2, 3, 4, 6, 7, 8, 9, 10]
+    assert list(report.codes) == [NAME_NOT_STRING, NAME_EMPTY] + [
+        PRICE_INVALID] * 2 + [DUPLICATE] + [PRICE_INVALID] * 4
+    assert isinstance(report.error(0), InvalidItemNameError)
+    assert isinstance(report.error(2), InvalidItemPriceError)
+    assert next(report.messages()).startswith('Row 1: Item name must')
+    valid, report = validate_items([('fig', True), ('lime', False)])
+    assert not valid and list(report.codes) == [PRICE_INVALID] * 2
+    with pytest.raises(InvalidItemPriceError):
+        Item('fig', True)
+    items = ItemPool({'plum': Item('plum', 1)})
+    report = items.add_items(pairs)
+    assert len(report) == 9
+    assert items.get_size() == 3 and items.items['kiwi'] == Item('kiwi', 2.5)
+
+
+@pytest.mark.parametrize('suffix', ['csv', 'jsonl'])
+def test_parallel_import(tmp_path, suffix):
+    """Test that the parallel import matches the sequential one."""
+    rng = random.Random(4)
+    catalog = tmp_path / f'catalog.{suffix}'
+    lines = ['name,price'] if suffix == 'csv' else []
+    for _ in range(300):
+        name = ''.join(rng.choice('abcdef') for _ in range(3))
+        price = rng.choice(['1.5', '20', 'abc', '-3', '', '0.01'])
+        if suffix == 'csv':
+            lines.append(f'{name},{price}')
+        else:
+            lines.append(f'{{"name": "{name}", "price": "{price}"}}')
+        lines.append(rng.choice(['', 'garbage']))
+    catalog.write_text('\n'.join(lines) + '\n')
+    expected = LoadReport(max_errors=1000)
+    pool = ItemPool()
+    pool.import_catalog(catalog, expected)
+    assert expected.loaded and expected.rejected
+    for workers in (1, 2):
+        report = LoadReport(max_errors=1000)
+        parallel_pool = ItemPool()
+        import_catalog(parallel_pool, catalog, report, workers=workers,
+                       chunk_bytes=100)
+        assert list(parallel_pool.items.items()) == list(pool.items.items())
+        assert report.summary() == expected.summary()
+    expected = ItemPool().import_catalog(catalog, LoadReport(max_errors=5))
+    report = LoadReport(max_errors=5)
+    import_catalog(ItemPool(), catalog, report, workers=2, chunk_bytes=100)
+    assert report.summary() == expected.summary()
+
+
 def test_shopping_list_init():
     """Test the ShoppingList class initialization."""
     shopping_list = ShoppingList()
@@ -122,6 +265,29 @@ def test_shopping_list_error_check():
     shopping_list.error_check(4, [1, 2, 2, 1, 5, 6, 3, 4], items)
 
 
+def test_shopping_list_validate():
+    """Test the ShoppingList class validate method."""
+    items = ItemPool({'orange': Item('orange', 1),
+                      'apple': Item('apple', 2),
+                      'lemon': Item('lemon', 3)})
+    shopping_list = ShoppingList()
+    quantities = [1, 2, 3]
+    assert shopping_list.validate(3, quantities, items)[1] is quantities
+    assert shopping_list.validate(2, [4], items) == (2, [4, 1])
+    long_quantities = list(range(1, 100001))
+    assert shopping_list.validate(2, long_quantities,
+                                  items)[1] is long_quantities
+    assert shopping_list.validate(1, [True, 2], items) == (1, [True, 2])
+    with pytest.raises(ValueError):
+        shopping_list.validate(2, long_quantities + [0], items)
+    with pytest.raises(ValueError):
+        shopping_list.validate(2, long_quantities + [2.0], items)
+    with pytest.raises(InvalidShoppingListSizeError):
+        shopping_list.validate(4, quantities, items)
+    shopping_list.refresh(items, 2, long_quantities)
+    assert [qnt for _, qnt in shopping_list.list] == [1, 2]
+
+
 def test_shopping_list_get_total_price():
     """Test the ShoppingList class get_total_price method."""
     items = ItemPool({'orange': Item('orange', 1.00)})
@@ -138,6 +304,47 @@ def test_shopping_list_get_item_price():
     assert shopping_list.get_item_price(0) == 1.00
 
 
+def test_shopping_list_get_total_cents():
+    """Test the ShoppingList class get_total_cents method."""
+    items = ItemPool({'orange': Item('orange', 0.1)})
+    shopping_list = ShoppingList(1, [3], item_pool=items)
+    assert shopping_list.get_total_cents() == 30
+    shopping_list.list = [(Item('orange', 0.1), 1)] * 1000
+    assert shopping_list.get_total_cents() == 10000
+    assert shopping_list.get_total_price() == 100.00
+    assert shopping_list.get_item_cents(0) == 10
+
+
+def test_shopping_list_edit_lines(monkeypatch):
+    """Test the ShoppingList class line editing methods."""
+    monkeypatch.setattr(debug, 'DEBUG', True)
+    shopping_list = ShoppingList()
+    assert shopping_list.get_total_cents() == 0
+    shopping_list.add_line(Item('orange', 1.25), 2)
+    shopping_list.add_line(Item('apple', 0.5))
+    shopping_list.add_line(Item('lemon', 3), 4)
+    assert shopping_list.get_total_cents() == 250 + 50 + 1200
+    shopping_list.set_quantity(1, 3)
+    assert shopping_list.get_total_cents() == 250 + 150 + 1200
+    assert shopping_list.remove_line(0) == (Item('orange', 1.25), 2)
+    assert shopping_list.get_total_cents() == 150 + 1200
+    assert len(shopping_list) == 2
+    with pytest.raises(ValueError):
+        shopping_list.add_line(Item('jam', 1), 0)
+    with pytest.raises(ValueError):
+        shopping_list.set_quantity(0, 'two')
+    with pytest.raises(ValueError):
+        shopping_list.add_line('jam')
+    assert shopping_list.list == [(Item('apple', 0.5), 3),
+                                  (Item('lemon', 3), 4)]
+    with pytest.raises(TypeError):
+        shopping_list.list[0] = (Item('jam', 1), 1)
+    assert not hasattr(shopping_list.list, 'append')
+    shopping_list._lines.append((Item('jam', 1), 1))
+    with pytest.raises(AssertionError):
+        shopping_list.get_total_cents()
+
+
 def test_shopping_list_len():
     """Test the ShoppingList class len method."""
     items = ItemPool({'orange': Item('orange', 1),
@@ -162,10 +369,41 @@ def test_item_init():
         item = Item(None, 0.99)
 
 
+def test_money():
+    """Test the to_cents and format_cents functions."""
+    assert to_cents(1) == 100
+    assert to_cents(1.005) == 100
+    assert to_cents(0.29) == 29
+    assert to_cents('2.50') == 250
+    with pytest.raises(ValueError):
+        to_cents('abc')
+    assert format_cents(250) == '$2.50'
+    assert format_cents(5, 3) == '$000.05'
+    assert format_cents(-550) == '$-5.50'
+    assert Item('orange', 0.29).cents == 29
+    assert Item.from_cents('orange', 29) == Item('orange', 0.29)
+    with pytest.raises(InvalidItemPriceError):
+        Item.from_cents('orange', 0)
+    assert Item.from_cents('orange', MAX_CENTS).cents == MAX_CENTS
+    with pytest.raises(InvalidItemPriceError):
+        Item.from_cents('orange', MAX_CENTS + 1)
+    with pytest.raises(InvalidItemPriceError):
+        Item('orange', 1e17)
+    with pytest.raises(InvalidItemPriceError):
+        Item('fig', 0.004)
+    with pytest.raises(InvalidItemPriceError):
+        Item('orange', 10 ** 17)
+    valid, report = validate_items([('orange', 1e17), ('apple', '1e17')])
+    assert not valid and list(report.codes) == [PRICE_INVALID] * 2
+
+
 def test_item_get_order():
     """Test the Item class get_order method."""
     item = Item('orange', 1.00)
     assert item.get_order() == 0
+    for price, order in ((0.05, -2), (0.1, -1), (0.99, -1), (9.99, 0),
+                         (10, 1), (999.99, 2), (1000, 3)):
+        assert Item('orange', price).get_order() == order
 
 
 def test_item_get_price_str():
@@ -174,6 +412,9 @@ def test_item_get_price_str():
     assert item.get_price_str() == '$1.00'
     item = Item('orange', 1.00)
     assert item.get_price_str(hide_price=True) == '$?.??'
+    item = Item('orange', 25.18)
+    assert item.get_price_str(quantity=3, order=3) == '$0075.54'
+    assert item.get_price_str(hide_price=True, order=2) == '$???.??'
 
 
 def test_item_get_list_item_str():
@@ -201,6 +442,26 @@ def test_item_eq():
     assert item1 != item2
 
 
+def test_item_value_type():
+    """Test that Item instances are immutable, hashable values."""
+    item = Item('orange', 1.00)
+    with pytest.raises(AttributeError):
+        item.cents = 200
+    with pytest.raises(AttributeError):
+        item.color = 'orange'
+    with pytest.raises(AttributeError):
+        del item.name
+    assert hash(item) == hash(Item('orange', 1))
+    basket = {Item('orange', 1), Item('apple', 2)}
+    assert basket & {Item('orange', 1.00)} == {item}
+    assert basket - {item} == {Item('apple', 2)}
+    assert pickle.loads(pickle.dumps(item)) == item
+    assert Item.interned('orange', 1) is Item.interned('orange', 1.00)
+    assert Item.interned('orange', 1) is not Item.interned('orange', 2)
+    with pytest.raises(InvalidItemPriceError):
+        Item.interned('orange', 'abc')
+
+
 def test_item_pool_init():
     """Test the ItemPool class initialization."""
     item_pool = ItemPool()
@@ -213,6 +474,11 @@ def test_item_pool_init():
              'jam': Item('jam', 6)}
     item_pool = ItemPool(items)
     assert item_pool.items == items
+    items['kiwi'] = Item('kiwi', 7)
+    assert item_pool.get_size() == 6 and 'kiwi' not in item_pool.items
+    assert len(item_pool.sample_items(7)) == 6
+    with pytest.raises(NonExistingItemError):
+        item_pool.remove_item('kiwi')
     with pytest.raises(InvalidItemPoolError):
         item_pool = ItemPool(123)
     with pytest.raises(InvalidItemPoolError):
@@ -262,6 +528,513 @@ def test_item_pool_remove_item():
         item_pool.remove_item('123')
 
 
+def test_item_pool_sample_items():
+    """Test the ItemPool class sample_items method."""
+    items = {'orange': Item('orange', 1),
+             'apple': Item('apple', 2),
+             'lemon': Item('lemon', 3),
+             'banana': Item('banana', 4),
+             'walnut': Item('walnut', 5),
+             'jam': Item('jam', 6)}
+    item_pool = ItemPool(items)
+    item_pool.remove_item('apple')
+    item_pool.remove_item('jam')
+    item_pool.add_item(Item('kiwi', 7))
+    sample = item_pool.sample_items(10)
+    assert len(sample) == 5
+    assert sorted(item.name for item in sample) == sorted(item_pool.items)
+    for item in item_pool.sample_items(3):
+        assert item_pool.items[item.name] is item
+    assert not ItemPool().sample_items(3)
+
+
+def test_item_pool_sorted_names():
+    """Test the ItemPool class sorted_names method."""
+    items = ItemPool({'orange': Item('orange', 1),
+                      'apple': Item('apple', 2),
+                      'lemon': Item('lemon', 3)})
+    assert list(items.sorted_names()) == ['apple', 'lemon', 'orange']
+    items.add_item(Item('banana', 4))
+    items.remove_item('lemon')
+    assert list(items.sorted_names()) == ['apple', 'banana', 'orange']
+    assert list(items.sorted_names().iter_prefix('b')) == ['banana']
+    assert list(items.sorted_names().irange('b', 'p')) == ['banana',
+                                                           'orange']
+    assert items.sorted_names()[1:] == ['banana', 'orange']
+
+
+def test_item_pool_layout():
+    """Test the ItemPool class layout method against a full scan."""
+    rng = random.Random(3)
+    prices = [0.05, 0.5, 1, 9.99, 10, 99.99, 250, 1999.99, 10000]
+    for item_pool in (ItemPool(), ColumnarItemPool()):
+        assert item_pool.layout() == (0, 0)
+        names = []
+        for _ in range(600):
+            if names and rng.random() < 0.5:
+                name = names.pop(rng.randrange(len(names)))
+                item_pool.remove_item(name)
+            else:
+                name = ''.join(rng.choice('abcdefgh')
+                               for _ in range(rng.randint(1, 12)))
+                if name in names:
+                    continue
+                item_pool.add_item(Item(name, rng.choice(prices)))
+                names.append(name)
+            items = item_pool.items.values()
+            assert item_pool.layout() == (
+                max((len(item.name) for item in items), default=0),
+                max([0] + [item.get_order() for item in items]))
+
+
+def test_max_counter():
+    """Test the MaxCounter class."""
+    counter = MaxCounter([3, 1, 3])
+    assert counter.max() == 3
+    counter.discard(3)
+    assert counter.max() == 3
+    counter.discard(3)
+    assert counter.max() == 1
+    counter.add(-2)
+    counter.discard(1)
+    assert counter.max() == -2
+    assert len(counter) == 1
+    counter.discard(-2)
+    assert counter.max(0) == 0
+    with pytest.raises(KeyError):
+        counter.discard(5)
+
+
+def test_sorted_names(monkeypatch):
+    """Test the SortedNames class against a sorted list."""
+    monkeypatch.setattr(SortedNames, 'chunk_size', 4)
+    rng = random.Random(7)
+    expected = []
+    names = SortedNames()
+    for _ in range(2000):
+        if expected and rng.random() < 0.45:
+            name = rng.choice(expected)
+            expected.remove(name)
+            names.remove(name)
+        else:
+            name = ''.join(rng.choice('abcde')
+                           for _ in range(rng.randint(1, 4)))
+            if name in expected:
+                continue
+            expected.append(name)
+            expected.sort()
+            names.add(name)
+        assert list(names) == expected
+        if expected:
+            start, stop = sorted(rng.randrange(len(expected) + 1)
+                                 for _ in range(2))
+            assert list(names.islice(start, stop)) == expected[start:stop]
+            assert names[start - 1] == expected[start - 1]
+            assert list(names.iter_prefix('c')) == [
+                name for name in expected if name.startswith('c')]
+    with pytest.raises(ValueError):
+        names.remove('zzzzz')
+
+
+def test_radix_tree():
+    """Test the RadixTree class against a sorted list."""
+    rng = random.Random(5)
+    expected = []
+    names = RadixTree()
+    for _ in range(2000):
+        if expected and rng.random() < 0.45:
+            name = rng.choice(expected)
+            expected.remove(name)
+            names.remove(name)
+        else:
+            name = ''.join(rng.choice('abé ')
+                           for _ in range(rng.randint(1, 5)))
+            if name in expected:
+                continue
+            expected.append(name)
+            expected.sort()
+            names.add(name)
+        assert list(names) == expected and len(names) == len(expected)
+        prefix = ''.join(rng.choice('abé ') for _ in range(rng.randint(0, 3)))
+        assert list(names.iter_prefix(prefix)) == [
+            name for name in expected if name.startswith(prefix)]
+        assert (prefix in names) == (prefix in expected)
+    for name in ('zzz', 'a' * 9, expected[0][:-1] or 'q'):
+        if name not in expected:
+            with pytest.raises(ValueError):
+                names.remove(name)
+
+
+def test_trigram_index(monkeypatch):
+    """Test the TrigramIndex class against a scan of the names."""
+    monkeypatch.setattr('core.ngram.MIN_REBUILD', 4)
+    posting = PostingList()
+    for ident in (0, 5, 300, 100_000):
+        posting.append(ident)
+    assert list(posting) == [0, 5, 300, 100_000] and len(posting) == 4
+    assert len(posting.data) == 7
+    rng = random.Random(6)
+    expected = set()
+    index = TrigramIndex()
+    for _ in range(1500):
+        if expected and rng.random() < 0.45:
+            name = rng.choice(sorted(expected))
+            expected.remove(name)
+            index.remove(name)
+        else:
+            name = ''.join(rng.choice('aBcÉé')
+                           for _ in range(rng.randint(1, 7)))
+            expected.add(name)
+            index.add(name)
+        assert len(index) == len(expected)
+        text = ''.join(rng.choice('abcé') for _ in range(rng.randint(1, 4)))
+        assert sorted(index.search(text)) == sorted(
+            name for name in expected if text in name.casefold())
+    with pytest.raises(ValueError):
+        index.remove('zzz')
+
+
+def test_weighted_sampler():
+    """Test the WeightedSampler class against a weight dictionary."""
+    rng = random.Random(3)
+    expected = {}
+    sampler = WeightedSampler()
+    for step in range(1500):
+        roll = rng.random()
+        if expected and roll < 0.3:
+            key = rng.choice(sorted(expected))
+            del expected[key]
+            sampler.remove(key)
+        elif expected and roll < 0.5:
+            key = rng.choice(sorted(expected))
+            expected[key] = rng.randint(1, 20)
+            sampler.set_weight(key, expected[key])
+        else:
+            expected[step] = rng.randint(1, 20)
+            sampler.add(step, expected[step])
+        assert len(sampler) == len(expected)
+        assert sampler.total() == sum(expected.values())
+        drawn = sampler.sample(min(5, len(expected)), rng)
+        assert len(set(drawn)) == len(drawn)
+        assert set(drawn) <= set(expected)
+        assert sampler.total() == sum(expected.values())
+    with pytest.raises(ValueError):
+        sampler.sample(len(expected) + 1)
+    heavy = WeightedSampler([('a', 1), ('b', 1), ('c', 98)])
+    firsts = [heavy.sample(2, rng)[0] for _ in range(1000)]
+    assert firsts.count('c') > 900
+    assert sorted(heavy.sample(3, rng)) == ['a', 'b', 'c']
+    skewed = WeightedSampler([('a', 1e20), ('b', 1)])
+    for _ in range(100):
+        assert skewed.sample(2, rng) == ['a', 'b']
+    skewed.add('c', 0.1)
+    skewed.set_weight('a', 2.5)
+    assert skewed.total() == 3.6 and skewed.get_weight('c') == 0.1
+    skewed.set_weight('a', 1e300)
+    skewed.remove('a')
+    assert skewed.total() == 1.1
+    assert sorted(skewed.sample(2, rng)) == ['b', 'c']
+
+
+def test_item_pool_weights():
+    """Test the item weights and weighted sampling of the pools."""
+    for pool in (ItemPool(), ColumnarItemPool()):
+        for name in ('orange', 'apple', 'lemon', 'banana'):
+            pool.add_item(Item(name, 1))
+        assert pool.get_weight('apple') == 1
+        pool.set_weight('apple', 1000)
+        pool.sample_items(2, weighted=True)
+        pool.remove_item('lemon')
+        pool.add_item(Item('kiwi', 2))
+        pool.set_weight('kiwi', 0.5)
+        assert pool.weighted_sampler().total() == 1002.5
+        picked = [pool.sample_items(1, random.Random(seed),
+                                    weighted=True)[0].name
+                  for seed in range(200)]
+        assert picked.count('apple') > 190
+        assert len(pool.sample_items(9, weighted=True)) == 4
+        with pytest.raises(InvalidItemWeightError):
+            pool.set_weight('kiwi', 0)
+        with pytest.raises(InvalidItemWeightError):
+            pool.set_weight('kiwi', True)
+        with pytest.raises(NonExistingItemError):
+            pool.set_weight('lemon', 2)
+        shopping_list = ShoppingList()
+        shopping_list.refresh(pool, 1, rng=random.Random(1), weighted=True)
+        assert shopping_list.list[0][0].name == 'apple'
+
+
+def test_snapshot_item_pool(tmp_path):
+    """Test writing and mapping item pool snapshots."""
+    path = tmp_path / 'pool.snapshot'
+    names = [a + b for a in 'abcdefghij' for b in 'klmnopqrstuvwxyz']
+    items = ColumnarItemPool({name: Item(name, 1 + i / 8)
+                              for i, name in enumerate(names[:100])})
+    items.add_item(Item('Crèmebrûlée', 6.5))
+    write_snapshot(items, path)
+    pool = SnapshotItemPool(path)
+    assert pool == items
+    assert pool.get_size() == 101
+    assert pool.items['Crèmebrûlée'] == Item('Crèmebrûlée', 6.5)
+    assert names[100] not in pool.items
+    assert pool.price_column() == items.price_column()
+    assert pool.layout() == items.layout()
+    with pytest.raises(ReadOnlyItemPoolError):
+        pool.add_item(Item('kiwi', 1))
+    with pytest.raises(ReadOnlyItemPoolError):
+        pool.remove_item('ak')
+    assert pickle.loads(pickle.dumps(pool)) == items
+    pool.close()
+    pool = SnapshotItemPool(path, writable=True)
+    rng = random.Random(2)
+    for step in range(300):
+        if rng.random() < 0.5 and items.get_size():
+            name = rng.choice(list(items.items))
+            items.remove_item(name)
+            pool.remove_item(name)
+        else:
+            item = Item(rng.choice(names), 1 + step)
+            if item.name not in items.items:
+                items.add_item(item)
+                pool.add_item(item)
+        assert pool.get_size() == items.get_size()
+    assert pool == items
+    assert sorted(pool.price_column()) == sorted(items.price_column())
+    assert SnapshotItemPool(path).get_size() == 101
+    with pytest.raises(TypeError):
+        pickle.dumps(pool)
+    write_snapshot(ItemPool(), path)
+    assert SnapshotItemPool(path).get_size() == 0
+    dearest = ColumnarItemPool({'caviar': Item.from_cents('caviar',
+                                                          MAX_CENTS)})
+    write_snapshot(dearest, path)
+    assert SnapshotItemPool(path) == dearest
+    path.write_bytes(b'not a snapshot at all, really not')
+    with pytest.raises(ValueError):
+        SnapshotItemPool(path)
+
+
+def test_trusted_constructors(monkeypatch):
+    """Test the trusted constructors and their debug mode checks."""
+    monkeypatch.setattr(debug, 'DEBUG', False)
+    assert Item.trusted('orange', 125) == Item('orange', 1.25)
+    assert Item.trusted('orange', 0).cents == 0
+    items = {'orange': Item('orange', 1)}
+    for pool_class in (ItemPool, ColumnarItemPool):
+        assert pool_class.from_validated(items) == pool_class(items)
+    assert ItemPool.from_validated({3: 'x'}).get_size() == 1
+    monkeypatch.setattr(debug, 'DEBUG', True)
+    with pytest.raises(InvalidItemPriceError):
+        Item.trusted('orange', 0)
+    with pytest.raises(InvalidItemNameError):
+        Item.trusted(None, 100)
+    for pool_class in (ItemPool, ColumnarItemPool):
+        with pytest.raises(InvalidItemPoolError):
+            pool_class.from_validated({3: 'x'})
+        pool = pool_class.from_validated(dict(items))
+        with pytest.raises(DuplicateItemError):
+            pool.add_validated([(0, 'orange', 100)])
+        pool.add_validated([(0, 'apple', 250)])
+        assert pool.items['apple'] == Item('apple', 2.5)
+        assert pool._known(['apple', 'kiwi', None]) == {'apple'}
+
+
+def test_sqlite_item_pool(tmp_path, monkeypatch):
+    """Test the SQLite backed item pool against an ItemPool."""
+    path = tmp_path / 'pool.db'
+    expected = ItemPool({'orange': Item('orange', 1)})
+    pool = SQLiteItemPool(path, {'orange': Item('orange', 1)})
+    rng = random.Random(8)
+    names = [a + b for a in 'abcdefgh' for b in 'ijklmnop']
+    for step in range(200):
+        if rng.random() < 0.4 and expected.get_size():
+            name = rng.choice(list(expected.items))
+            expected.remove_item(name)
+            pool.remove_item(name)
+        else:
+            item = Item(rng.choice(names), 1 + step / 4)
+            if item.name in expected.items:
+                with pytest.raises(DuplicateItemError):
+                    pool.add_item(item)
+            else:
+                expected.add_item(item)
+                pool.add_item(item)
+    assert pool == expected
+    assert pool.get_size() == expected.get_size()
+    assert sorted(pool.price_column()) == sorted(expected.price_column())
+    assert list(pool.sorted_names()) == list(expected.sorted_names())
+    assert pool.layout() == expected.layout()
+    sample = pool.sample_items(5, random.Random(1))
+    assert len(set(sample)) == 5 and all(
+        expected.items[item.name] == item for item in sample)
+    report = pool.add_items([('kiwi', 2), ('kiwi', 3), ('fig', 'x')])
+    assert len(report) == 2 and pool.items['kiwi'] == Item('kiwi', 2)
+    with pytest.raises(NonExistingItemError):
+        pool.remove_item('zzz')
+    other = pickle.loads(pickle.dumps(pool))
+    other.add_item(Item('melon', 4))
+    assert pool.items['melon'] == Item('melon', 4)
+    assert other.get_size() == pool.get_size()
+    other.close()
+    pool.close()
+    assert SQLiteItemPool(path).items['kiwi'] == Item('kiwi', 2)
+    single = SQLiteItemPool(path, readers=1)
+    assert single.items == single.items and len(single.items) == 15
+    assert single.items_at([3, 0, 3]) == [single.item_at(3),
+                                          single.item_at(0),
+                                          single.item_at(3)]
+    monkeypatch.setattr(sqlitepool, 'SCAN_BATCH', 4)
+    assert list(single.iter_items()) == list(single.items.values())
+    names, items = iter(single.items), single.iter_items()
+    assert next(names) == next(items).name
+    single.close()
+    app_engine = AppEngine(items=SQLiteItemPool(path))
+    app_engine.process_del_item('del kiwi')
+    app_engine.process_add_item('add pear: 1.50')
+    assert SQLiteItemPool(path).items['pear'] == Item('pear', 1.5)
+    assert 'kiwi' not in SQLiteItemPool(path).items
+
+
+def test_lru_cache():
+    """Test the LRUCache class."""
+    cache = LRUCache(10)
+    cache.put('a', 1, 4)
+    cache.put('b', 2, 4)
+    assert cache.get('a') == 1
+    cache.put('c', 3, 4)
+    assert cache.get('b') is None and cache.peek('c') == 3
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 1,
+                             'entries': 2, 'bytes': 8, 'max_bytes': 10}
+    cache.put('d', 4, 20)
+    assert len(cache) == 1 and cache.bytes == 20
+    with pytest.raises(ValueError):
+        LRUCache(-1)
+
+
+def test_disk_item_pool(tmp_path, monkeypatch):
+    """Test the disk backed item pool against an ItemPool."""
+    path = tmp_path / 'pool'
+    expected = ItemPool({'orange': Item('orange', 1)})
+    pool = DiskItemPool(path, {'orange': Item('orange', 1)},
+                        cache_bytes=4 * PAGE_SIZE)
+    rng = random.Random(8)
+    names = [a + b for a in 'abcdefghé' for b in 'ijklmnop']
+    for step in range(400):
+        if rng.random() < 0.4 and expected.get_size():
+            name = rng.choice(list(expected.items))
+            expected.remove_item(name)
+            pool.remove_item(name)
+        else:
+            item = Item(rng.choice(names) * (1 + step % 300), 1 + step / 4)
+            if item.name in expected.items:
+                with pytest.raises(DuplicateItemError):
+                    pool.add_item(item)
+            else:
+                expected.add_item(item)
+                pool.add_item(item)
+    assert pool == expected
+    assert list(pool.iter_items()) == [pool.item_at(slot) for slot
+                                       in range(pool.get_size())]
+    assert sorted(pool.price_column()) == sorted(expected.price_column())
+    assert list(pool.sorted_names()) == list(expected.sorted_names())
+    assert pool.layout() == expected.layout()
+    assert pool.cache.bytes <= 4 * PAGE_SIZE and pool.cache.evictions
+    item = pool.item_at(0)
+    hits, misses = pool.cache.hits, pool.cache.misses
+    assert pool.item_at(0) == item
+    assert pool.cache.hits > hits and pool.cache.misses == misses
+    pool.close()
+    reopened = DiskItemPool(path)
+    assert reopened == expected
+    reopened.add_item(Item('kiwi', 2))
+    reopened.close()
+    assert DiskItemPool(path).items['kiwi'] == Item('kiwi', 2)
+    monkeypatch.setattr(diskpool, 'SCAN_RECORDS', 2)
+    kept = {name: Item(name, 1) for name in names[:5]}
+    churn = DiskItemPool(tmp_path / 'churn', kept)
+    for step in range(300):
+        churn.add_item(Item('melon' * 20, 1 + step))
+        churn.remove_item('melon' * 20)
+    assert (tmp_path / 'churn.names').stat().st_size < 300
+    churn.close()
+    assert DiskItemPool(tmp_path / 'churn') == ItemPool(kept)
+    (tmp_path / 'other.slots').write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        DiskItemPool(tmp_path / 'other')
+
+
+def test_mutation_log(tmp_path):
+    """Test the replay of the mutation log of an item pool."""
+    path = tmp_path / 'pool.log'
+    pool = ItemPool({'orange': Item('orange', 1)})
+    log = open_log(pool, path, sync_records=5, sync_interval=60)
+    rng = random.Random(3)
+    for step in range(300):
+        if rng.random() < 0.3 and pool.get_size():
+            pool.remove_item(rng.choice(list(pool.items)))
+        elif rng.random() < 0.1:
+            pool.add_items([('fig', 1), ('kiwi', 'x'), ('lime', 2)])
+        else:
+            name = rng.choice('abcdefgh') + rng.choice('ijklmnopé')
+            if name not in pool.items:
+                pool.add_item(Item(name, 1 + step / 4))
+    assert pickle.loads(pickle.dumps(pool)).log is None
+    log.close()
+    assert 0 < log.syncs < 300
+    with pytest.raises(ValueError):
+        log.log_add(Item('melon', 3))
+    size = path.stat().st_size
+    with open(path, 'ab') as stream:
+        stream.write(b'\x01\x02\x03' * 9)
+    replayed = ItemPool({'orange': Item('orange', 1)})
+    assert replay_log(replayed, path) > 100
+    assert replayed == pool and path.stat().st_size == size
+    pool.log = None
+    pool.add_item(Item('melon', 3))
+    replayed = ItemPool({'orange': Item('orange', 1)})
+    log = open_log(replayed, path)
+    replayed.add_item(Item('melon', 3))
+    log.close()
+    replayed = ItemPool({'orange': Item('orange', 1)})
+    replay_log(replayed, path)
+    assert replayed == pool
+    assert replay_log(ItemPool(), tmp_path / 'missing.log') == 0
+
+
+def test_item_pool_store(tmp_path):
+    """Test the recovery of an item pool from snapshots and logs."""
+    store = ItemPoolStore(tmp_path, sync_interval=0.001)
+    with pytest.raises(ValueError, match='not open'):
+        store.snapshot()
+    pool = store.open()
+    pool.add_items([(name, 2) for name in ('apple', 'fig', 'kiwi', 'lime')])
+    pool.remove_item('fig')
+    assert store.snapshot() < 1 and len(store.pauses) == 1
+    pool.add_item(Item('melon', 3))
+    pool.remove_item('apple')
+    store.close()
+    assert store_numbers(tmp_path, 'snapshot') == [1]
+    assert store_numbers(tmp_path, 'log') == [1]
+    store = ItemPoolStore(tmp_path, snapshot_interval=0.01)
+    recovered = store.open()
+    assert isinstance(recovered, SnapshotItemPool) and recovered == pool
+    recovered.add_item(Item('pear', 4))
+    pool.add_item(Item('pear', 4))
+    deadline = time.monotonic() + 30
+    while store_numbers(tmp_path, 'snapshot')[-1] < 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    recovered.remove_item('kiwi')
+    pool.remove_item('kiwi')
+    store.close()
+    recovered.close()
+    assert store_numbers(tmp_path, 'log') == [3]
+    store = ItemPoolStore(tmp_path)
+    assert store.open() == pool
+    store.close()
+    store.item_pool.close()
+
+
 def test_item_pool_repr():
     """Test the ItemPool class __repr__ method."""
     item_pool = ItemPool()
@@ -315,3 +1088,235 @@ def test_item_pool_eq():
              'banana': Item('banana', 4),
              'walnut': Item('walnut', 5),
              'jam': Item('jam', 6)}
+
+
+def test_columnar_item_pool():
+    """Test the ColumnarItemPool class against the ItemPool class."""
+    items = {'orange': Item('orange', 1),
+             'apple': Item('apple', 2),
+             'lemon': Item('lemon', 3),
+             'banana': Item('banana', 4),
+             'walnut': Item('walnut', 5),
+             'jam': Item('jam', 6)}
+    item_pool = ColumnarItemPool(items)
+    assert item_pool == ItemPool(dict(items))
+    assert item_pool.get_size() == 6
+    assert item_pool.items['lemon'] == Item('lemon', 3)
+    item_pool.remove_item('orange')
+    item_pool.remove_item('apple')
+    assert 'orange' not in item_pool.items
+    assert sorted(item_pool.items.keys()) == ['banana', 'jam',
+                                              'lemon', 'walnut']
+    for name in item_pool.items:
+        assert item_pool.items[name].name == name
+    item_pool.add_item(Item('orange', 7))
+    assert item_pool.items['orange'].price == 7
+    assert len(item_pool.sample_items(10)) == 5
+    with pytest.raises(DuplicateItemError):
+        item_pool.add_item(Item('orange', 1))
+    with pytest.raises(NonExistingItemError):
+        item_pool.remove_item('apple')
+    with pytest.raises(InvalidItemPoolError):
+        ColumnarItemPool({'orange': 123})
+    shopping_list = ShoppingList(3, [1, 2, 3], item_pool=item_pool)
+    assert len(shopping_list) == 3
+
+
+def test_columnar_item_pool_churn():
+    """Test the ColumnarItemPool class with many adds and removes."""
+    names = ['item' + ''.join(chr(97 + int(d)) for d in str(i))
+             for i in range(500)]
+    item_pool = ColumnarItemPool()
+    expected = ItemPool()
+    for i, name in enumerate(names):
+        item_pool.add_item(Item(name, i + 1))
+        expected.add_item(Item(name, i + 1))
+    for name in names[::3] + names[1::3]:
+        item_pool.remove_item(name)
+        expected.remove_item(name)
+    assert item_pool == expected
+    for name in names[::3]:
+        item_pool.add_item(Item(name, 1))
+        expected.add_item(Item(name, 1))
+    assert item_pool == expected
+
+
+def test_render_iter_item_lines():
+    """Test the iter_item_lines function."""
+    items = ItemPool({'orange': Item('orange', 1.5),
+                      'jam': Item('jam', 12)})
+    assert list(iter_item_lines(items)) == ['ITEMS\n',
+                                            '- jam ...... $12.00\n',
+                                            '- orange ... $01.50\n']
+
+
+def test_render_iter_list_lines():
+    """Test the iter_list_lines function."""
+    shopping_list = ShoppingList()
+    shopping_list.add_line(Item('orange', 1.5))
+    assert ''.join(iter_list_lines(shopping_list, mask_index=0)) == (
+        'SHOPPING LIST\n'
+        '- orange (1x) ... $?.??\n'
+        '-----------------------\n'
+        'TOTAL ........... $1.50\n')
+    with pytest.raises(ValueError):
+        list(iter_list_lines(ShoppingList()))
+    shopping_list = ShoppingList()
+    shopping_list.add_line(Item.from_cents('gold', 5 * 10 ** 18), 9)
+    assert shopping_list.get_total_cents() > MAX_CENTS
+    assert list(iter_list_lines(shopping_list))[-1] == (
+        'TOTAL ......... $4050000000000000000.00\n')
+
+
+def test_render_write_lines():
+    """Test the write_lines function."""
+    writes = []
+
+    class Stream(io.StringIO):
+        """Text stream recording every write."""
+        def write(self, text):
+            writes.append(text)
+            return super().write(text)
+
+    stream = Stream()
+    write_lines(iter(['a\n', 'b\n', 'c\n']), stream, chunk_lines=2)
+    assert stream.getvalue() == 'a\nb\nc\n'
+    assert writes == ['a\nb\n', 'c\n']
+
+
+def test_app_cli_show_pages():
+    """Test the AppCLI class paged show commands."""
+    items = ItemPool({'orange': Item('orange', 1),
+                      'apple': Item('apple', 2),
+                      'lemon': Item('lemon', 30),
+                      'banana': Item('banana', 4),
+                      'walnut': Item('walnut', 5)})
+    shopping_list = ShoppingList(4, [1, 2, 3, 4], item_pool=items)
+    app = AppCLI(shopping_list, items)
+    full = app.show_items().splitlines()
+    app.execute_command('show items page 2 size 2')
+    assert ''.join(app.app_engine.message).splitlines() == (
+        ['ITEMS'] + full[3:5] + ['Page 2 of 3'])
+    app.execute_command('show items page 3 size 2')
+    assert ''.join(app.app_engine.message).splitlines() == (
+        ['ITEMS'] + full[5:] + ['Page 3 of 3'])
+    app.execute_command('show items page 4 size 2')
+    assert app.app_engine.message == 'Cannot show page 4 of 3.'
+    app.execute_command('show items page 1 size 0')
+    assert app.app_engine.message.startswith(
+        'Cannot show pages of size 0.\nUsage: show items page')
+    full = app.show_list().splitlines()
+    app.execute_command('show list from 2 to 3')
+    assert ''.join(app.app_engine.message).splitlines() == (
+        full[:1] + full[2:4] + full[-2:])
+    app.execute_command('show list from 3 to 5')
+    assert app.app_engine.message == 'Cannot show lines 3 to 5 of 4.'
+    app = AppCLI(ShoppingList(), items)
+    app.execute_command('show list')
+    assert app.app_engine.message == 'Cannot show an empty shopping list.'
+    app = AppCLI(shopping_list, items)
+    app.execute_command('ask window 1')
+    assert 4 <= len(app.app_engine.message.splitlines()) <= 6
+    assert app.app_engine.correct_answer is not None
+
+
+def test_app_cli_search():
+    """Test the AppCLI class search and find commands and name
+    completion."""
+    items = ItemPool({'orange': Item('orange', 1),
+                      'apple': Item('apple', 2),
+                      'apricot': Item('apricot', 30)})
+    app = AppCLI(ShoppingList(2, [1, 2], item_pool=items), items)
+    app.execute_command('search ap')
+    assert app.app_engine.message == 'apple\napricot'
+    items.add_item(Item('Apricot', 3))
+    items.add_item(Item('apex', 3))
+    items.remove_item('apple')
+    app.app_engine.search_limit = 1
+    app.execute_command('search ap')
+    assert app.app_engine.message == 'apex\n... (first 1 shown)'
+    app.execute_command('search kiwi')
+    assert app.app_engine.message == 'No item name starts with "kiwi".'
+    app.execute_command('search')
+    assert app.app_engine.message == 'Usage: search <prefix>'
+    assert app.completions('del apr') == ['del apricot']
+    assert app.completions('s') == ['search ', 'show items', 'show list']
+    assert [app.complete('del A', state) for state in range(2)] == [
+        'del Apricot', None]
+    app.app_engine.search_limit = 2
+    items.add_item(Item('Beef Steak', 20))
+    app.execute_command('find RIC')
+    assert app.app_engine.message == 'Apricot\napricot'
+    app.execute_command('find steak')
+    assert app.app_engine.message == 'Beef Steak'
+    items.remove_item('apricot')
+    app.execute_command('find ric')
+    assert app.app_engine.message == 'Apricot'
+    app.execute_command('find e')
+    assert app.app_engine.message == (
+        'Beef Steak\napex\n... (first 2 shown)')
+    app.execute_command('find kiwi')
+    assert app.app_engine.message == 'No item name contains "kiwi".'
+    assert app.completions('del Be') == []
+    assert app.completions('search Be') == ['search Beef Steak']
+    app.execute_command('del Beef Steak')
+    assert app.app_engine.message == (
+        'Cannot delete "Beef Steak": del only takes alphabetic item names.')
+    app.execute_command('del ')
+    assert isinstance(app.app_engine.message, InvalidItemNameError)
+    app.execute_command(app.completions('del Apr')[0])
+    assert app.app_engine.message == 'Apricot removed successfully.'
+
+
+@pytest.mark.parametrize('use_numpy', [False, None])
+def test_generate_batch(use_numpy):
+    """Test the generate_batch function."""
+    items = ColumnarItemPool({'orange': Item('orange', 1),
+                              'apple': Item('apple', 2.5),
+                              'lemon': Item('lemon', 3),
+                              'banana': Item('banana', 4)})
+    for size in (None, 1, 4):
+        batch = generate_batch(items, 200, size, seed=11,
+                               use_numpy=use_numpy)
+        assert len(batch) == 200
+        totals = batch.totals()
+        for i in range(len(batch)):
+            lines = batch.lines(i)
+            slots = [slot for slot, _ in lines]
+            assert len(set(slots)) == len(slots)
+            assert size is None or len(slots) == size
+            assert all(1 <= qnt <= 9 for _, qnt in lines)
+            assert batch.shopping_list(i).get_total_cents() == totals[i]
+    again = generate_batch(items, 200, 4, seed=11, use_numpy=use_numpy)
+    assert [again.lines(i) for i in range(200)] == [
+        batch.lines(i) for i in range(200)]
+    assert not len(generate_batch(items, 0, use_numpy=use_numpy).totals())
+    with pytest.raises(InvalidShoppingListSizeError):
+        generate_batch(items, 1, 5, use_numpy=use_numpy)
+    with pytest.raises(ValueError):
+        generate_batch(items, 1, 0, use_numpy=use_numpy)
+
+
+@pytest.mark.parametrize('use_numpy', [False, None])
+def test_generate_parallel(use_numpy):
+    """Test that parallel generation does not depend on the workers."""
+    items = ColumnarItemPool({'orange': Item('orange', 1),
+                              'apple': Item('apple', 2.5),
+                              'lemon': Item('lemon', 3),
+                              'banana': Item('banana', 4)})
+    single = generate_parallel(items, 250, seed=5, workers=1, task_size=40,
+                               use_numpy=use_numpy)
+    double = generate_parallel(items, 250, seed=5, workers=2, task_size=40,
+                               use_numpy=use_numpy)
+    assert len(single) == len(double) == 250
+    assert [single.lines(i) for i in range(250)] == [
+        double.lines(i) for i in range(250)]
+    assert list(single.totals()) == list(double.totals())
+    assert [single.shopping_list(i).get_total_cents()
+            for i in range(250)] == list(single.totals())
+    assert list(price_parallel(items, 250, seed=5, workers=2, task_size=40,
+                               use_numpy=use_numpy)) == list(single.totals())
+    other = generate_parallel(items, 250, seed=6, workers=1, task_size=40,
+                              use_numpy=use_numpy)
+    assert [other.lines(i) for i in range(250)] != [
+        single.lines(i) for i in range(250)]
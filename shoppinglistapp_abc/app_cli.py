@@ -1,28 +1,90 @@
 """Main AppCLI class for the shopping list app."""
+import argparse
 import random
+import re
+import sys
+from collections.abc import Iterator
+from itertools import chain, islice
+try:
+    import readline
+except ImportError:
+    readline = None
 from shoppinglistapp.core.items import Item, ItemPool
 from shoppinglistapp.core.shoppinglist import ShoppingList
 from shoppinglistapp.core.appengine import AppEngine
+from shoppinglistapp.core.snapshot import SnapshotItemPool
+from shoppinglistapp.core.store import ItemPoolStore
+from shoppinglistapp.core.wal import open_log
+from shoppinglistapp.core.render import iter_item_lines, iter_list_lines,\
+    write_lines
+
+
+ITEMS_PAGE = re.compile(r'items page (\d+)(?: size (\d+))?')
+LIST_RANGE = re.compile(r'list from (\d+) to (\d+)')
+ASK_WINDOW = re.compile(r'(?:a|ask) window(?: (\d+))?')
+COMMANDS = ['add ', 'ask', 'del ', 'find ', 'import ', 'list', 'quit',
+            'search ', 'show items', 'show list']
 
 
 class AppCLI:
     """This class represents the command line interface of the app."""
+    page_size = 20
+    ask_window = 3
+    completion_limit = 100
+
     def __init__(self, shopping_list=None, items=None):
         self.app_engine = AppEngine(shopping_list, items)
+        self._completions = []
 
     def run(self):
         """Run the app."""
+        self.install_completion()
         while True:
             prompt = 'What would you like to do? '
             if self.app_engine.correct_answer is not None:
                 prompt = 'What amount should replace the questionmarks? $'
             cmd = input(prompt)
             self.execute_command(cmd)
-            print(f'{self.app_engine.message}\n')
+            if isinstance(self.app_engine.message, Iterator):
+                write_lines(self.app_engine.message, sys.stdout)
+                sys.stdout.write('\n\n')
+            else:
+                print(f'{self.app_engine.message}\n')
             self.app_engine.message = None
             if not self.app_engine.continue_execution:
                 break
 
+    def install_completion(self):
+        """Make the tab key complete commands and item names, where
+        readline is available."""
+        if readline is None:
+            return
+        readline.set_completer(self.complete)
+        readline.set_completer_delims('')
+        readline.parse_and_bind('tab: complete')
+
+    def complete(self, text, state):
+        """Return the state-th completion of the input line text, or
+        None after the last one (the readline completer protocol)."""
+        if state == 0:
+            self._completions = self.completions(text)
+        if state < len(self._completions):
+            return self._completions[state]
+        return None
+
+    def completions(self, text):
+        """Return the completions of a partial input line: item names
+        after search, the names del accepts after del, command names
+        otherwise."""
+        command, space, prefix = text.partition(' ')
+        if space and command in ('del', 'search'):
+            names = self.app_engine.items.name_trie().iter_prefix(prefix)
+            if command == 'del':
+                names = filter(str.isalpha, names)
+            return [f'{command} {name}' for name in
+                    islice(names, self.completion_limit)]
+        return [name for name in COMMANDS if name.startswith(text)]
+
     def execute_command(self, cmd):
         """Execute the command."""
         if self.app_engine.correct_answer is not None:
@@ -32,6 +94,10 @@ class AppCLI:
             self.app_engine.message = 'Have a nice day!'
         elif cmd in ('a', 'ask'):
             self.process_ask()
+        elif ASK_WINDOW.fullmatch(cmd):
+            window = ASK_WINDOW.fullmatch(cmd).group(1)
+            self.process_ask(
+                self.ask_window if window is None else int(window))
         elif cmd in ('l', 'list'):
             self.app_engine.shopping_list.refresh(
                     item_pool=self.app_engine.items)
@@ -44,87 +110,148 @@ class AppCLI:
             self.app_engine.process_add_item(cmd)
         elif cmd.startswith('del'):
             self.app_engine.process_del_item(cmd)
+        elif cmd.startswith('import'):
+            self.app_engine.process_import(cmd)
+        elif cmd.startswith('search'):
+            self.app_engine.process_search(cmd)
+        elif cmd.startswith('find'):
+            self.app_engine.process_find(cmd)
         else:
             self.app_engine.message = f'"{cmd}" is not a valid command.'
 
-    def process_ask(self):
-        """Process the ask command."""
+    def process_ask(self, window=None):
+        """Process the ask command.
+
+        With a window only the lines up to window lines away from the
+        masked one are shown."""
         mask_q = random.randint(0, len(self.app_engine.shopping_list.list))
-        self.app_engine.message = self.show_list(mask_index=mask_q)
+        if window is None:
+            self.app_engine.message = self.show_list(mask_index=mask_q)
+        else:
+            self.app_engine.message = self.show_list(
+                mask_index=mask_q, start=max(mask_q - window, 0),
+                stop=mask_q + window + 1)
         if mask_q < len(self.app_engine.shopping_list.list):
             self.app_engine.correct_answer\
-                  = self.app_engine.shopping_list.get_item_price(mask_q)
+                  = self.app_engine.shopping_list.get_item_cents(mask_q)
         else:
             self.app_engine.correct_answer\
-              = self.app_engine.shopping_list.get_total_price()
+              = self.app_engine.shopping_list.get_total_cents()
 
     def process_show(self, cmd):
         """Process the show command."""
         what = cmd[5:]
         if what == 'items':
-            self.app_engine.message = self.show_items()
+            self.app_engine.message = iter_item_lines(self.app_engine.items)
         elif what == 'list':
-            self.app_engine.message = self.show_list()
+            try:
+                self.app_engine.message = iter_list_lines(
+                    self.app_engine.shopping_list)
+            except ValueError as error:
+                self.app_engine.message = str(error)
+        elif ITEMS_PAGE.fullmatch(what):
+            page, size = ITEMS_PAGE.fullmatch(what).groups()
+            self.process_show_page(int(page),
+                                   self.page_size if size is None
+                                   else int(size))
+        elif LIST_RANGE.fullmatch(what):
+            first, last = LIST_RANGE.fullmatch(what).groups()
+            self.process_show_range(int(first), int(last))
         else:
             self.app_engine.message = f'Cannot show {what}.\n'
-            self.app_engine.message += 'Usage: show list|items'
-
-    def show_items(self):
-        """Show the items in the item pool."""
-        max_name, max_order = 0, 0
-        for item in self.app_engine.items.items.values():
-            max_name = max(max_name, len(item.name))
-            max_order = max(max_order, item.get_order())
-        out = 'ITEMS\n'
-        for item_name in sorted(self.app_engine.items.items.keys()):
-            item = self.app_engine.items.items[item_name]
-            padding = (max_name - len(item_name) + 3) * '.'
-            out += (f'{item.get_list_item_str(quantity=None)} {padding} '
-                    f'{item.get_price_str(order=max_order)}\n')
-        return out
-
-    def show_list(self, mask_index=None):
-        """Show the shopping list."""
-        line_base_len = len('TOTAL') - 4
-        max_item = max(len(item.name) for item,
-                       _ in self.app_engine.shopping_list.list)
-        line_base_len = max(max_item, line_base_len) + (5 - 2)
-        total = Item('TOTAL', self.app_engine.shopping_list.get_total_price())
-        max_order = total.get_order()
-        max_name = len(total.name)
-        for item, _ in self.app_engine.shopping_list.list:
-            max_name = max(max_name, len(item.name))
-            max_order = max(max_order, item.get_order())
-        out = 'SHOPPING LIST\n'
-        i = 0
-        quantity = None
-        for i, (item, quantity) in enumerate(
-                self.app_engine.shopping_list.list):
-            hide_price = mask_index == i
-            padding = (line_base_len - len(item.name)) * '.'
-            out += (f'{item.get_list_item_str(quantity)} {padding} '
-                    f'{item.get_price_str(quantity, hide_price, max_order)}'
-                    f'\n')
-        i += 1
-        hide_price = mask_index == i
-        padding = (line_base_len + 2) * '.'
-        total_line = (f'TOTAL {padding} '
-                      f'{total.get_price_str(quantity, order = max_order)}')
-        hline = '-'*len(total_line) + '\n'
-        return out+hline+total_line + '\n'
+            self.app_engine.message += ('Usage: show list [from <i> to <j>]'
+                                        '|items [page <n> [size <m>]]')
+
+    def process_show_page(self, page, size):
+        """Process the show items page command."""
+        if size < 1:
+            self.app_engine.message = (f'Cannot show pages of size {size}.\n'
+                                       'Usage: show items page <n> '
+                                       '[size <m>] with m at least 1')
+            return
+        pages = -(-self.app_engine.items.get_size() // size)
+        if not 1 <= page <= pages:
+            self.app_engine.message = (f'Cannot show page {page} '
+                                       f'of {pages}.')
+            return
+        self.app_engine.message = chain(
+            iter_item_lines(self.app_engine.items,
+                            (page - 1) * size, page * size),
+            [f'Page {page} of {pages}\n'])
+
+    def process_show_range(self, first, last):
+        """Process the show list from ... to ... command."""
+        size = len(self.app_engine.shopping_list)
+        if not 1 <= first <= last <= size:
+            self.app_engine.message = (f'Cannot show lines {first} to '
+                                       f'{last} of {size}.')
+            return
+        self.app_engine.message = iter_list_lines(
+            self.app_engine.shopping_list, start=first - 1, stop=last)
+
+    def show_items(self, stream=None, start=0, stop=None):
+        """Show the items in the item pool.
+
+        Return the text, or write it to stream if one is given."""
+        return self.render(
+            iter_item_lines(self.app_engine.items, start, stop), stream)
+
+    def show_list(self, mask_index=None, stream=None, start=0, stop=None):
+        """Show the shopping list.
+
+        Return the text, or write it to stream if one is given."""
+        return self.render(
+            iter_list_lines(self.app_engine.shopping_list, mask_index,
+                            start, stop),
+            stream)
+
+    @staticmethod
+    def render(lines, stream=None):
+        """Join the lines, or write them to stream if one is given."""
+        if stream is None:
+            return ''.join(lines)
+        write_lines(lines, stream)
+        return None
 
 
 if __name__ == '__main__':
-    # usage example
-    item2 = Item('Macbook', 1999.99)
-    item3 = Item('Milk', 4.25)
-    item4 = Item('Hotel Room', 255.00)
-    item5 = Item('Beef Steak', 25.18)
-    ip = ItemPool()
-    ip.add_item(item2)
-    ip.add_item(item3)
-    ip.add_item(item4)
-    ip.add_item(item5)
+    # usage example: python app_cli.py [snapshot file]
+    #                [--log log file | --store directory]
+    parser = argparse.ArgumentParser()
+    parser.add_argument('snapshot', nargs='?')
+    durability = parser.add_mutually_exclusive_group()
+    durability.add_argument('--log', help='replay this mutation log at '
+                            'start and append the changes to the pool to '
+                            'it')
+    durability.add_argument('--store', help='recover the pool from this '
+                            'directory of snapshots and logs and keep its '
+                            'changes there')
+    args = parser.parse_args()
+    store = None
+    if args.store:
+        store = ItemPoolStore(args.store)
+        ip = store.open()
+    elif args.snapshot:
+        ip = SnapshotItemPool(args.snapshot, writable=True)
+    else:
+        ip = ItemPool()
+    if not args.snapshot and not ip.get_size():
+        item2 = Item('Macbook', 1999.99)
+        item3 = Item('Milk', 4.25)
+        item4 = Item('Hotel Room', 255.00)
+        item5 = Item('Beef Steak', 25.18)
+        ip.add_item(item2)
+        ip.add_item(item3)
+        ip.add_item(item4)
+        ip.add_item(item5)
+    if args.log:
+        open_log(ip, args.log)
     sp = ShoppingList(size=3, quantities=[3, 2, 4], item_pool=ip)
     app = AppCLI(sp, ip)
-    app.run()
+    try:
+        app.run()
+    finally:
+        if store is not None:
+            store.close()
+        elif ip.log is not None:
+            ip.log.close()
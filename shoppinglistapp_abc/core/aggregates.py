@@ -0,0 +1,41 @@
+"""This module contains the MaxCounter class."""
+from collections import Counter
+
+
+class MaxCounter:
+    """This class represents a counted multiset of values that knows
+    its largest value.
+
+    Adding is O(1). Removing is O(1) unless the last copy of the
+    largest value goes, in which case the distinct values left are
+    scanned; for name lengths and price orders there are only a few."""
+    def __init__(self, values=()):
+        self._counts = Counter(values)
+        self._max = max(self._counts, default=None)
+
+    def add(self, value):
+        """Add one copy of value."""
+        self._counts[value] += 1
+        if self._max is None or value > self._max:
+            self._max = value
+
+    def discard(self, value):
+        """Remove one copy of value, raise KeyError if there is none."""
+        count = self._counts[value]
+        if count == 0:
+            del self._counts[value]
+            raise KeyError(value)
+        if count > 1:
+            self._counts[value] = count - 1
+            return
+        del self._counts[value]
+        if value == self._max:
+            self._max = max(self._counts, default=None)
+
+    def max(self, default=None):
+        """Return the largest value, or default if there is none."""
+        return default if self._max is None else self._max
+
+    def __len__(self):
+        """Return the number of values, counting copies."""
+        return sum(self._counts.values())
@@ -1,11 +1,20 @@
 """This module contains the AppEngine class."""
+import csv
+import heapq
+from itertools import islice
+
 from shoppinglistapp.core.items import Item
+from shoppinglistapp.core.money import to_cents, format_cents
 from shoppinglistapp.core.errors import InvalidItemNameError, InvalidItemPriceError,\
     NonExistingItemError, DuplicateItemError
 
 
 class AppEngine:
-    """This class is the main engine of the application."""
+    """This class is the main engine of the application.
+
+    The expected answer to a question is kept in integer cents."""
+    search_limit = 20
+
     def __init__(self, shopping_list=None, items=None):
         self.items = items
         self.shopping_list = shopping_list
@@ -17,14 +26,15 @@ class AppEngine:
     def process_answer(self, cmd):
         """Process the answer to the question."""
         try:
-            answer = round(float(cmd), 2)
+            answer = to_cents(cmd)
             if answer == self.correct_answer:
                 self.message = 'Correct!'
             else:
                 self.message = (f'Not Correct!'
-                                f'(Expected ${self.correct_answer:.02f})\n'
-                                f'You answered ${answer:.02f}.')
-        except ValueError:
+                                f'(Expected '
+                                f'{format_cents(self.correct_answer)})\n'
+                                f'You answered {format_cents(answer)}.')
+        except (ValueError, OverflowError):
             self.message = InvalidItemPriceError(cmd)
         self.correct_answer = None
 
@@ -39,6 +49,53 @@ class AppEngine:
             self.message = f'Cannot add "{item_str}".\n'
             self.message += 'Usage: add <item_name>: <item_price>'
 
+    def process_import(self, cmd):
+        """Process the import command."""
+        path = cmd[7:]
+        if not path:
+            self.message = 'Usage: import <path.csv|path.jsonl>'
+            return
+        try:
+            self.message = self.items.import_catalog(path).summary()
+        except (OSError, ValueError, csv.Error) as error:
+            self.message = f'Cannot import "{path}": {error}'
+
+    def process_search(self, cmd):
+        """Process the search command: show the first search_limit item
+        names starting with the given prefix."""
+        prefix = cmd[7:]
+        if not prefix:
+            self.message = 'Usage: search <prefix>'
+            return
+        self.show_names(
+            islice(self.items.name_trie().iter_prefix(prefix),
+                   self.search_limit + 1),
+            f'No item name starts with "{prefix}".')
+
+    def process_find(self, cmd):
+        """Process the find command: show the first search_limit item
+        names containing the given text, ignoring case."""
+        text = cmd[5:]
+        if not text:
+            self.message = 'Usage: find <text>'
+            return
+        self.show_names(
+            heapq.nsmallest(self.search_limit + 1,
+                            self.items.ngram_index().search(text)),
+            f'No item name contains "{text}".')
+
+    def show_names(self, names, missing):
+        """Show the first search_limit names, or the missing message if
+        there are none."""
+        names = list(names)
+        if not names:
+            self.message = missing
+            return
+        lines = names[:self.search_limit]
+        if len(names) > self.search_limit:
+            lines.append(f'... (first {self.search_limit} shown)')
+        self.message = '\n'.join(lines)
+
     def process_del_item(self, cmd):
         """Process the delete item command."""
         item_name = cmd[4:]
@@ -47,6 +104,12 @@ class AppEngine:
             self.message = f'{item_name} removed successfully.'
         except NonExistingItemError:
             self.message = NonExistingItemError(item_name)
+        except InvalidItemNameError:
+            if item_name:
+                self.message = (f'Cannot delete "{item_name}": del only '
+                                'takes alphabetic item names.')
+            else:
+                self.message = InvalidItemNameError(item_name)
 
     def validate_add_item(self, item, price):
         """Validate the add item command."""
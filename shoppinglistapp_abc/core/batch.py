@@ -0,0 +1,191 @@
+"""This module contains the ShoppingListBatch class and the
+generate_batch function.
+
+A batch holds many shopping lists in flat arrays: the pool slot and
+the quantity of every line, plus the offset at which every list starts.
+The random draws are vectorized with NumPy when it is installed and
+done with the random module otherwise."""
+import random
+from array import array
+from itertools import accumulate
+from operator import mul
+
+from shoppinglistapp.core.errors import InvalidShoppingListSizeError
+from shoppinglistapp.core.shoppinglist import ShoppingList
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# largest number of random keys drawn at once by the NumPy generator
+CHUNK_CELLS = 1 << 22
+
+
+class ShoppingListBatch:
+    """This class represents a batch of shopping lists.
+
+    The lines of list i are slots[offsets[i]:offsets[i + 1]] with the
+    matching quantities. Slots refer to the item pool the batch was
+    generated from and are only valid while that pool is unchanged."""
+    def __init__(self, item_pool, prices, slots, quantities, offsets,
+                 totals=None):
+        self.item_pool = item_pool
+        self.prices = prices
+        self.slots = slots
+        self.quantities = quantities
+        self.offsets = offsets
+        self._totals = totals
+
+    def __len__(self):
+        """Return the number of lists in the batch."""
+        return len(self.offsets) - 1
+
+    def lines(self, i):
+        """Return the (slot, quantity) lines of the i-th list."""
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return [(int(slot), int(qnt)) for slot, qnt in
+                zip(self.slots[start:stop], self.quantities[start:stop])]
+
+    def shopping_list(self, i):
+        """Return the i-th list as a ShoppingList."""
+        shopping_list = ShoppingList()
+        shopping_list.list = [(self.item_pool.item_at(slot), qnt)
+                              for slot, qnt in self.lines(i)]
+        return shopping_list
+
+    def totals(self):
+        """Return the total price in cents of every list, computed in
+        one pass over the lines."""
+        if self._totals is None:
+            self._totals = line_totals(self.prices, self.slots,
+                                       self.quantities, self.offsets)
+        return self._totals
+
+
+def line_totals(prices, slots, quantities, offsets):
+    """Return the total price in cents of every list of a batch."""
+    if numpy is not None and isinstance(slots, numpy.ndarray):
+        if len(offsets) < 2:
+            return numpy.zeros(0, numpy.int64)
+        line_cents = prices[slots] * quantities
+        return numpy.add.reduceat(line_cents, offsets[:-1])
+    running = [0]
+    running.extend(accumulate(map(mul, map(prices.__getitem__, slots),
+                                  quantities)))
+    return array('q', [running[offsets[i + 1]] - running[offsets[i]]
+                       for i in range(len(offsets) - 1)])
+
+
+def check_size(pool_size, size):
+    """Check the list size asked from a pool of pool_size items."""
+    if size is not None:
+        if not isinstance(size, int) or size < 1:
+            raise ValueError()
+        if size > pool_size:
+            raise InvalidShoppingListSizeError()
+    elif pool_size < 1:
+        raise InvalidShoppingListSizeError()
+
+
+def price_array(item_pool, use_numpy):
+    """Return the price column of the pool as a NumPy array if
+    use_numpy is True, as an array.array otherwise."""
+    prices = item_pool.price_column()
+    if use_numpy:
+        return numpy.frombuffer(prices, numpy.int64)
+    return prices
+
+
+def generate_batch(item_pool, count, size=None, seed=None,
+                   use_numpy=None):
+    """Return a ShoppingListBatch of count random shopping lists.
+
+    Like ShoppingList.refresh, every list holds distinct items with
+    quantities from 1 to 9, and has size lines or, if size is None, a
+    uniformly drawn number of lines. The same seed gives the same
+    batch. NumPy is used when it is installed, unless use_numpy is
+    False."""
+    check_size(item_pool.get_size(), size)
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    return ShoppingListBatch(item_pool, price_array(item_pool, use_numpy),
+                             *draw_lines(item_pool.get_size(), count, size,
+                                         seed, use_numpy))
+
+
+def draw_lines(pool_size, count, size, seed, use_numpy):
+    """Return the (slots, quantities, offsets) arrays of count random
+    lists drawn from a pool of pool_size items."""
+    if use_numpy:
+        return _draw_numpy(pool_size, count, size, seed)
+    return _draw_python(pool_size, count, size, seed)
+
+
+def _draw_python(pool_size, count, size, seed):
+    """Draw the lines of a batch with the random module."""
+    rng = random.Random(seed)
+    slots, quantities, offsets = array('q'), array('b'), array('q', [0])
+    population = range(pool_size)
+    for _ in range(count):
+        list_size = size or rng.randint(1, pool_size)
+        slots.extend(rng.sample(population, list_size))
+        quantities.extend(rng.choices(range(1, 10), k=list_size))
+        offsets.append(len(slots))
+    return slots, quantities, offsets
+
+
+def _draw_numpy(pool_size, count, size, seed):
+    """Draw the lines of a batch with vectorized NumPy draws."""
+    rng = numpy.random.default_rng(seed)
+    if size is None:
+        sizes = rng.integers(1, pool_size + 1, count)
+    else:
+        sizes = numpy.full(count, size, numpy.int64)
+    offsets = numpy.zeros(count + 1, numpy.int64)
+    numpy.cumsum(sizes, out=offsets[1:])
+    slots = numpy.empty(offsets[-1], numpy.int64)
+    quantities = rng.integers(1, 10, offsets[-1], dtype=numpy.int8)
+    widest = int(sizes.max()) if count else 0
+    sparse = widest * widest <= pool_size
+    rows = max(1, CHUNK_CELLS // max(widest if sparse else pool_size, 1))
+    for start in range(0, count, rows):
+        stop = min(count, start + rows)
+        block = sizes[start:stop]
+        width = int(block.max())
+        if sparse:
+            draws = _draw_sparse(rng, pool_size, len(block), width)
+        else:
+            draws = _draw_dense(rng, pool_size, len(block), width)
+        keep = numpy.arange(width) < block[:, None]
+        slots[offsets[start]:offsets[stop]] = draws[keep]
+    return slots, quantities, offsets
+
+
+def _draw_sparse(rng, pool_size, rows, width):
+    """Return rows rows of width distinct slots each, drawn with
+    replacement and redrawn where a row repeats a slot.
+
+    Only used when width ** 2 <= pool_size, where repeats are rare."""
+    draws = rng.integers(0, pool_size, (rows, width))
+    while True:
+        ordered = numpy.sort(draws, axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        if not repeated.any():
+            return draws
+        draws[repeated] = rng.integers(0, pool_size,
+                                       (int(repeated.sum()), width))
+
+
+def _draw_dense(rng, pool_size, rows, width):
+    """Return rows rows of width distinct slots each, taken as the
+    slots with the smallest random keys."""
+    keys = rng.random((rows, pool_size))
+    if width < pool_size:
+        smallest = numpy.argpartition(keys, width - 1, axis=1)[:, :width]
+    else:
+        smallest = numpy.broadcast_to(numpy.arange(pool_size),
+                                      (rows, pool_size))
+    order = numpy.argsort(numpy.take_along_axis(keys, smallest, axis=1),
+                          axis=1)
+    return numpy.take_along_axis(smallest, order, axis=1)
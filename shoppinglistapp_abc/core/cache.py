@@ -0,0 +1,63 @@
+"""This module contains the LRUCache class."""
+from collections import OrderedDict
+
+
+class LRUCache:
+    """This class represents a cache of at most max_bytes bytes of
+    values that evicts the least recently used values first.
+
+    Every value is stored with its size in bytes. Hits, misses and
+    evictions are counted."""
+    def __init__(self, max_bytes):
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ValueError(max_bytes)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Return the value of key, or None if it is not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key):
+        """Return the value of key, or None, without counting the access
+        or refreshing the key."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def put(self, key, value, size):
+        """Cache a value of size bytes, evicting the least recently used
+        values while the cache is over max_bytes. The newest value is
+        always kept."""
+        self.discard(key)
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def discard(self, key):
+        """Drop the value of key if it is cached."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def __len__(self):
+        """Return the number of cached values."""
+        return len(self._entries)
+
+    def stats(self):
+        """Return the counters of the cache as a dictionary."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self),
+                'bytes': self.bytes, 'max_bytes': self.max_bytes}
@@ -0,0 +1,156 @@
+"""This module contains the ColumnarItemPool class."""
+from array import array
+from collections.abc import Mapping, ValuesView
+
+from shoppinglistapp.core.hashtable import SlotTable
+from shoppinglistapp.core.items import Item, ItemPool
+
+
+class ColumnarItemValues(ValuesView):
+    """Values view that walks the pool slots instead of the keys."""
+    def __iter__(self):
+        """Iterate over the items of the pool in slot order."""
+        return self._mapping.pool.iter_items()
+
+
+class ColumnarItems(Mapping):
+    """Read-only name to Item mapping over a ColumnarItemPool.
+
+    Item objects are built on access and are not kept by the pool."""
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __getitem__(self, name):
+        """Return the item with the given name."""
+        slot = self.pool.slot_of(name)
+        if slot < 0:
+            raise KeyError(name)
+        return self.pool.item_at(slot)
+
+    def __contains__(self, name):
+        """Return True if an item with the given name is in the pool."""
+        return self.pool.slot_of(name) >= 0
+
+    def __iter__(self):
+        """Iterate over the item names in slot order."""
+        pool = self.pool
+        for slot in range(pool.get_size()):
+            yield pool.name_at(slot)
+
+    def __len__(self):
+        """Return the number of items in the pool."""
+        return self.pool.get_size()
+
+    def values(self):
+        """Return a view over the items of the pool."""
+        return ColumnarItemValues(self)
+
+    def __repr__(self):
+        """Return the string representation of the mapping."""
+        return repr(dict(self.items()))
+
+
+class ColumnarItemPool(SlotTable, ItemPool):
+    """This class represents a pool of items stored column by column.
+
+    Prices live in a typed array of cents and names in a single UTF-8
+    string table indexed by offset and length, so the pool holds no Item
+    objects. Items are looked up through an open addressing hash table
+    of slot numbers and removed by moving the last slot into the hole.
+    """
+    def __init__(self, items=None, validate=True):
+        self._prices = array('q')
+        self._offsets = array('Q')
+        self._lengths = array('L')
+        self._names = bytearray()
+        self._garbage = 0
+        self._new_table(8)
+        self._used = 0
+        self._tombstones = 0
+        self._view = ColumnarItems(self)
+        super().__init__(items, validate)
+
+    @property
+    def items(self):
+        """Return a read-only name to Item mapping of the pool."""
+        return self._view
+
+    def _load(self, items):
+        """Copy an already validated items dictionary into the columns."""
+        self._resize(len(items))
+        for item in items.values():
+            self._store(item)
+
+    def _store(self, item):
+        """Append an already validated item to the columns."""
+        key = item.name.encode()
+        self._insert_key(key, len(self._prices))
+        self._prices.append(item.cents)
+        self._offsets.append(len(self._names))
+        self._lengths.append(len(key))
+        self._names += key
+
+    def _discard(self, item_name):
+        """Drop an item known to be in the pool."""
+        slot = self._delete_key(item_name.encode())
+        self._garbage += self._lengths[slot]
+        last = len(self._prices) - 1
+        if slot != last:
+            self._move_key(self._name_bytes(last), slot)
+            self._prices[slot] = self._prices[last]
+            self._offsets[slot] = self._offsets[last]
+            self._lengths[slot] = self._lengths[last]
+        self._prices.pop()
+        self._offsets.pop()
+        self._lengths.pop()
+        if self._garbage * 2 > len(self._names):
+            self._compact()
+
+    def _name_bytes(self, slot):
+        """Return the encoded name stored in the given slot."""
+        start = self._offsets[slot]
+        return bytes(self._names[start:start + self._lengths[slot]])
+
+    _slot_key = _name_bytes
+    _key_hash = staticmethod(hash)
+
+    def _new_table(self, capacity):
+        """Replace the lookup table with an empty one of capacity
+        entries."""
+        self._table = array('q', bytes(8 * capacity))
+
+    def _compact(self):
+        """Drop the bytes of removed names from the string table."""
+        names = bytearray()
+        for slot in range(len(self._prices)):
+            start = self._offsets[slot]
+            self._offsets[slot] = len(names)
+            names += self._names[start:start + self._lengths[slot]]
+        self._names = names
+        self._garbage = 0
+
+    def slot_of(self, item_name):
+        """Return the slot of the named item, or -1 if it is missing."""
+        if not isinstance(item_name, str):
+            return -1
+        return self._find_slot(item_name.encode())
+
+    def name_at(self, slot):
+        """Return the name of the item in the given slot."""
+        return self._name_bytes(slot).decode()
+
+    def item_at(self, slot):
+        """Return a new Item for the given slot."""
+        return Item.trusted(self.name_at(slot), self._prices[slot])
+
+    def price_column(self):
+        """Return a copy of the item prices in cents, in slot order."""
+        return array('q', self._prices)
+
+    def get_size(self):
+        """Return the size of the pool."""
+        return len(self._prices)
+
+    def __repr__(self):
+        """Return the string representation of the pool."""
+        return f'ColumnarItemPool({self.items})'
@@ -0,0 +1,11 @@
+"""This module contains the debug switch of the package.
+
+Debug mode turns on consistency checks that are too expensive for
+normal use, and makes the trusted constructors (Item.trusted,
+ItemPool.from_validated and ItemPool.add_validated) validate their
+input like the checked ones. It is enabled by setting the SHOPPINGLISTAPP_DEBUG
+environment variable to anything but an empty string or 0, or by
+setting DEBUG to True at runtime."""
+import os
+
+DEBUG = os.environ.get('SHOPPINGLISTAPP_DEBUG', '') not in ('', '0')
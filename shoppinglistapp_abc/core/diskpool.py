@@ -0,0 +1,318 @@
+"""This module contains the DiskItemPool class.
+
+A disk pool keeps its items in three files next to each other: path +
+'.slots' holds a header and one (cents, name offset) record per slot,
+path + '.names' is a heap of length-prefixed UTF-8 names and path +
+'.table' is an open addressing table of slot numbers keyed by the
+CRC-32 of the names. The files are read and written in pages of
+PAGE_SIZE bytes through an LRUCache bounded in bytes, so the memory
+used does not grow with the catalog; scans over all the items read
+the files directly instead of going through the cache. The name heap
+is rewritten without the names of removed items once they take up
+more than half of it."""
+import os
+import struct
+import zlib
+from array import array
+
+from shoppinglistapp.core.cache import LRUCache
+from shoppinglistapp.core.columnar import ColumnarItems
+from shoppinglistapp.core.hashtable import SlotTable
+from shoppinglistapp.core.items import Item, ItemPool
+
+PAGE_SIZE = 4096
+CACHE_BYTES = 64 << 20
+MAGIC = b'SLPDISK1'
+# magic, size, end of the name heap, table capacity, used and deleted
+# table entries, bytes of removed names in the heap
+HEADER = struct.Struct('<8sQQQQQQ')
+HEADER_BYTES = 64
+RECORD = struct.Struct('<qQ')
+NAME_LENGTH = struct.Struct('<I')
+ENTRY = struct.Struct('<q')
+# slot records read at once by the scans
+SCAN_RECORDS = 4096
+
+
+class PagedFile:
+    """This class represents a file read through a shared page cache.
+
+    Writes go straight to the file and update the cached copy of the
+    pages they touch."""
+    def __init__(self, path, cache, key):
+        self.path = path
+        self._file = open(path, 'r+b' if os.path.exists(path) else 'w+b',
+                          buffering=0)
+        self._cache = cache
+        self._key = key
+
+    def _page(self, number):
+        """Return the number-th page, from the cache if it is there."""
+        key = (self._key, number)
+        page = self._cache.get(key)
+        if page is None:
+            page = bytearray(self.read_direct(number * PAGE_SIZE,
+                                              PAGE_SIZE))
+            page.extend(bytes(PAGE_SIZE - len(page)))
+            self._cache.put(key, page, PAGE_SIZE)
+        return page
+
+    def read(self, offset, size):
+        """Return size bytes from offset, reading through the cache.
+
+        Bytes past the end of the file read as zeros."""
+        chunks = []
+        while size > 0:
+            number, start = divmod(offset, PAGE_SIZE)
+            take = min(size, PAGE_SIZE - start)
+            chunks.append(self._page(number)[start:start + take])
+            offset += take
+            size -= take
+        return b''.join(chunks)
+
+    def read_direct(self, offset, size):
+        """Return up to size bytes from offset, bypassing the cache."""
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def write(self, offset, data):
+        """Write data at offset."""
+        self._file.seek(offset)
+        self._file.write(data)
+        done = 0
+        while done < len(data):
+            number, start = divmod(offset + done, PAGE_SIZE)
+            take = min(len(data) - done, PAGE_SIZE - start)
+            page = self._cache.peek((self._key, number))
+            if page is not None:
+                page[start:start + take] = data[done:done + take]
+            done += take
+
+    def _forget(self):
+        """Drop the cached pages of the file."""
+        pages = -(-os.fstat(self._file.fileno()).st_size // PAGE_SIZE)
+        for number in range(pages):
+            self._cache.discard((self._key, number))
+
+    def reset(self, size):
+        """Empty the file and make it size zero bytes long."""
+        self._forget()
+        self._file.truncate(0)
+        self._file.truncate(size)
+
+    def replace(self, path):
+        """Move the file at path over this file and use it instead."""
+        self._forget()
+        self._file.close()
+        os.replace(path, self.path)
+        self._file = open(self.path, 'r+b', buffering=0)
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+
+class EntryFile(PagedFile):
+    """This class represents a paged file of 64-bit lookup table
+    entries, indexed like a sequence of capacity entries."""
+    def __init__(self, path, cache, key, capacity=0):
+        super().__init__(path, cache, key)
+        self.capacity = capacity
+
+    def __getitem__(self, index):
+        """Return the index-th entry."""
+        return ENTRY.unpack(self.read(ENTRY.size * index, ENTRY.size))[0]
+
+    def __setitem__(self, index, entry):
+        """Set the index-th entry."""
+        self.write(ENTRY.size * index, ENTRY.pack(entry))
+
+    def __len__(self):
+        """Return the number of entries."""
+        return self.capacity
+
+    def clear(self, capacity):
+        """Make the file capacity empty entries long."""
+        self.reset(ENTRY.size * capacity)
+        self.capacity = capacity
+
+
+class DiskItems(ColumnarItems):
+    """Read-only name to Item mapping over a DiskItemPool."""
+    def __iter__(self):
+        """Iterate over the item names in slot order."""
+        return (item.name for item in self.pool.iter_items())
+
+
+class DiskItemPool(SlotTable, ItemPool):
+    """This class represents a pool of items stored on disk behind a
+    bounded page cache.
+
+    The files are created if they do not exist and reopened otherwise.
+    Writes are not atomic: a crash in the middle of one can leave the
+    files inconsistent."""
+    def __init__(self, path, items=None, cache_bytes=CACHE_BYTES):
+        self.path = path
+        self.cache = LRUCache(cache_bytes)
+        exists = os.path.exists(f'{path}.slots')
+        self._records = PagedFile(f'{path}.slots', self.cache, 'slots')
+        self._names = PagedFile(f'{path}.names', self.cache, 'names')
+        self._table = EntryFile(f'{path}.table', self.cache, 'table')
+        if exists:
+            (magic, self._size, self._names_end, self._table.capacity,
+             self._used, self._tombstones, self._garbage) = HEADER.unpack(
+                 self._records.read_direct(0, HEADER.size))
+            if magic != MAGIC:
+                self.close()
+                raise ValueError(f'"{path}" is not a disk item pool.')
+        else:
+            self._size = self._names_end = self._garbage = 0
+            self._used = self._tombstones = 0
+            self._new_table(8)
+            self._save_header()
+        self._view = DiskItems(self)
+        super().__init__(items)
+
+    @property
+    def items(self):
+        """Return a read-only name to Item mapping of the pool."""
+        return self._view
+
+    def _save_header(self):
+        """Write the sizes of the pool to the header."""
+        self._records.write(0, HEADER.pack(
+            MAGIC, self._size, self._names_end, self._table.capacity,
+            self._used, self._tombstones, self._garbage))
+
+    def _load(self, items):
+        """Store an already validated items dictionary."""
+        for item in items.values():
+            self._store(item)
+
+    def _record(self, slot):
+        """Return the (cents, name offset) record of a slot."""
+        return RECORD.unpack(self._records.read(
+            HEADER_BYTES + RECORD.size * slot, RECORD.size))
+
+    def _name_bytes(self, offset):
+        """Return the encoded name stored at offset in the name heap."""
+        length, = NAME_LENGTH.unpack(self._names.read(offset,
+                                                      NAME_LENGTH.size))
+        return self._names.read(offset + NAME_LENGTH.size, length)
+
+    def _read_name(self, offset):
+        """Return the encoded name stored at offset in the name heap,
+        reading the file directly."""
+        length, = NAME_LENGTH.unpack(
+            self._names.read_direct(offset, NAME_LENGTH.size))
+        return self._names.read_direct(offset + NAME_LENGTH.size, length)
+
+    def _slot_key(self, slot):
+        """Return the encoded name of the item in the given slot."""
+        return self._name_bytes(self._record(slot)[1])
+
+    _key_hash = staticmethod(zlib.crc32)
+
+    def _new_table(self, capacity):
+        """Replace the lookup table with an empty one of capacity
+        entries."""
+        self._table.clear(capacity)
+
+    def _store(self, item):
+        """Append an already validated item."""
+        key = item.name.encode()
+        self._insert_key(key, self._size)
+        self._names.write(self._names_end,
+                          NAME_LENGTH.pack(len(key)) + key)
+        self._records.write(HEADER_BYTES + RECORD.size * self._size,
+                            RECORD.pack(item.cents, self._names_end))
+        self._names_end += NAME_LENGTH.size + len(key)
+        self._size += 1
+        self._save_header()
+
+    def _discard(self, item_name):
+        """Drop an item known to be in the pool, moving the last slot
+        into the freed one."""
+        key = item_name.encode()
+        slot = self._delete_key(key)
+        self._garbage += NAME_LENGTH.size + len(key)
+        last = self._size - 1
+        if slot != last:
+            record = self._record(last)
+            self._records.write(HEADER_BYTES + RECORD.size * slot,
+                                RECORD.pack(*record))
+            self._move_key(self._name_bytes(record[1]), slot)
+        self._size = last
+        if self._garbage * 2 > self._names_end:
+            self._compact()
+        self._save_header()
+
+    def _compact(self):
+        """Rewrite the name heap without the names of removed items and
+        point the slot records at the new offsets."""
+        partial = f'{self._names.path}.partial'
+        end = slot = 0
+        records = bytearray()
+        with open(partial, 'wb') as stream:
+            for cents, offset in self._scan_records():
+                key = self._read_name(offset)
+                stream.write(NAME_LENGTH.pack(len(key)) + key)
+                records += RECORD.pack(cents, end)
+                end += NAME_LENGTH.size + len(key)
+                if len(records) == RECORD.size * SCAN_RECORDS:
+                    # the scan has read these slots already
+                    self._records.write(HEADER_BYTES + RECORD.size * slot,
+                                        records)
+                    slot += SCAN_RECORDS
+                    records = bytearray()
+            self._records.write(HEADER_BYTES + RECORD.size * slot, records)
+        self._names.replace(partial)
+        self._names_end = end
+        self._garbage = 0
+
+    def slot_of(self, item_name):
+        """Return the slot of the named item, or -1 if it is missing."""
+        if not isinstance(item_name, str):
+            return -1
+        return self._find_slot(item_name.encode())
+
+    def name_at(self, slot):
+        """Return the name of the item in the given slot."""
+        return self._name_bytes(self._record(slot)[1]).decode()
+
+    def item_at(self, slot):
+        """Return the Item in the given slot."""
+        cents, offset = self._record(slot)
+        return Item.trusted(self._name_bytes(offset).decode(), cents)
+
+    def _scan_records(self):
+        """Yield the (cents, name offset) records of all the slots,
+        reading the file directly."""
+        for start in range(0, self._size, SCAN_RECORDS):
+            count = min(SCAN_RECORDS, self._size - start)
+            block = self._records.read_direct(
+                HEADER_BYTES + RECORD.size * start, RECORD.size * count)
+            yield from RECORD.iter_unpack(block)
+
+    def iter_items(self):
+        """Iterate over the items of the pool in slot order, reading the
+        files directly."""
+        for cents, offset in self._scan_records():
+            yield Item.trusted(self._read_name(offset).decode(), cents)
+
+    def price_column(self):
+        """Return a copy of the item prices in cents, in slot order."""
+        return array('q', [cents for cents, _ in self._scan_records()])
+
+    def get_size(self):
+        """Return the size of the pool."""
+        return self._size
+
+    def close(self):
+        """Close the files of the pool."""
+        for paged in (self._records, self._names, self._table):
+            paged.close()
+
+    def __repr__(self):
+        """Return the string representation of the pool."""
+        return f'DiskItemPool({self.path!r}, {self.get_size()} items)'
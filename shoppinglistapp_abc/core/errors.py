@@ -9,6 +9,11 @@ class InvalidItemNameError(Exception):
             super().__init__(f'Item name must be a string (not {type(item)}).')
         else:
             super().__init__('Item name string cannot be empty.')
+        self.item = item
+
+    def __reduce__(self):
+        """Return how to pickle the exception."""
+        return InvalidItemNameError, (self.item,)
 
 
 class InvalidItemPriceError(Exception):
@@ -19,6 +24,11 @@ class InvalidItemPriceError(Exception):
                          f'appear to be any of the following: float, '
                          f'an integer, or a string that can be parsed '
                          f'to a non-negative float.')
+        self.price = price
+
+    def __reduce__(self):
+        """Return how to pickle the exception."""
+        return InvalidItemPriceError, (self.price,)
 
 
 class InvalidItemPoolError(Exception):
@@ -30,6 +40,18 @@ class InvalidItemPoolError(Exception):
                          'as values.')
 
 
+class InvalidRecordError(Exception):
+    """This exception is raised when a catalog record cannot be read
+    as a name and a price."""
+    def __init__(self, record):
+        super().__init__(f'Record {record!r} is not a name and a price.')
+        self.record = record
+
+    def __reduce__(self):
+        """Return how to pickle the exception."""
+        return InvalidRecordError, (self.record,)
+
+
 class NonExistingItemError(Exception):
     """This exception is raised when an item is not present in
     the item pool."""
@@ -38,6 +60,22 @@ class NonExistingItemError(Exception):
                          f'in the item pool.')
 
 
+class InvalidItemWeightError(Exception):
+    """This exception is raised when an invalid item weight
+    is passed to the ItemPool"""
+    def __init__(self, weight):
+        super().__init__(f'The weight argument ("{weight}") must be '
+                         f'a positive finite integer or float.')
+
+
+class ReadOnlyItemPoolError(Exception):
+    """This exception is raised when a read-only item pool
+    is changed."""
+    def __init__(self, source):
+        super().__init__(f'The item pool loaded from "{source}" '
+                         f'is read-only.')
+
+
 class DuplicateItemError(Exception):
     """This exception is raised when an item is already present
     in the item pool."""
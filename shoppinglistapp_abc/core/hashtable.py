@@ -0,0 +1,82 @@
+"""This module contains the SlotTable mixin, the open addressing hash
+table that maps the encoded names of a pool to their slots."""
+
+# values stored in the table besides slot + 1
+EMPTY = 0
+DELETED = -1
+
+
+class SlotTable:
+    """This class is a mixin for pools that look their items up through
+    an open addressing hash table of slot numbers, with linear probing
+    and tombstones for the removed names.
+
+    The pool provides the table as self._table, indexable by position
+    and as long as its capacity, and the _key_hash, _slot_key and
+    _new_table methods. Its constructor sets the _used and _tombstones
+    counters of the table it starts with."""
+    # numbers of names and of tombstones in the table
+    _used = 0
+    _tombstones = 0
+
+    def _probe(self, key):
+        """Return the table index of key and whether it was found.
+
+        When the key is missing the index is the first reusable entry
+        on its probe sequence."""
+        table = self._table
+        mask = len(table) - 1
+        index = self._key_hash(key) & mask
+        free = -1
+        while True:
+            entry = table[index]
+            if entry == EMPTY:
+                return (index if free < 0 else free), False
+            if entry == DELETED:
+                if free < 0:
+                    free = index
+            elif self._slot_key(entry - 1) == key:
+                return index, True
+            index = (index + 1) & mask
+
+    def _find_slot(self, key):
+        """Return the slot of key, or -1 if it is missing."""
+        index, found = self._probe(key)
+        return self._table[index] - 1 if found else -1
+
+    def _resize(self, size):
+        """Rebuild the table with room for size names."""
+        capacity = 8
+        while capacity * 2 < size * 3:
+            capacity *= 2
+        self._new_table(capacity)
+        self._tombstones = 0
+        table = self._table
+        for slot in range(self.get_size()):
+            index, _ = self._probe(self._slot_key(slot))
+            table[index] = slot + 1
+
+    def _insert_key(self, key, slot):
+        """Map a missing key to slot, growing the table first if it is
+        more than two thirds full."""
+        if (self._used + self._tombstones + 1) * 3 > len(self._table) * 2:
+            self._resize(2 * (self._used + 1))
+        index, _ = self._probe(key)
+        if self._table[index] == DELETED:
+            self._tombstones -= 1
+        self._table[index] = slot + 1
+        self._used += 1
+
+    def _delete_key(self, key):
+        """Forget a key known to be in the table and return its slot."""
+        index, _ = self._probe(key)
+        slot = self._table[index] - 1
+        self._table[index] = DELETED
+        self._used -= 1
+        self._tombstones += 1
+        return slot
+
+    def _move_key(self, key, slot):
+        """Map a key known to be in the table to another slot."""
+        index, _ = self._probe(key)
+        self._table[index] = slot + 1
@@ -1,38 +1,122 @@
 """This module contains the Item and ItemPool classes."""
 import math
 import random
+import weakref
+from array import array
+from itertools import islice
 
+from shoppinglistapp.core import debug
 from shoppinglistapp.core.errors import InvalidItemPriceError, InvalidItemNameError,\
                         InvalidItemPoolError, DuplicateItemError,\
-                        NonExistingItemError
+                        NonExistingItemError, InvalidItemWeightError
+from shoppinglistapp.core.money import MAX_CENTS, to_cents, cents_order,\
+    format_cents, hidden_cents
+from shoppinglistapp.core.sortedindex import SortedNames
+from shoppinglistapp.core.radix import RadixTree
+from shoppinglistapp.core.ngram import TrigramIndex
+from shoppinglistapp.core.aggregates import MaxCounter
+from shoppinglistapp.core.sampling import WeightedSampler
+from shoppinglistapp.core.loaders import LoadReport, read_catalog
+from shoppinglistapp.core.validation import ValidationReport,\
+    validate_items, validate_records
+
+# records validated at once by ItemPool.load_records
+LOAD_BATCH = 4096
 
 
 class Item:
-    """This class represents an item in the store."""
+    """This class represents an item in the store.
+
+    Items are immutable values: the price is kept as an integer number
+    of cents together with its order of magnitude and the hash of the
+    item, all computed once. Item.interned returns one shared instance
+    per (name, price) pair."""
+    __slots__ = ('name', 'cents', 'order', '_hash', '__weakref__')
+    _interned = weakref.WeakValueDictionary()
+
     def __init__(self, name, price):
+        self.check_name(name)
+        if (not isinstance(price, (float, int)) or isinstance(price, bool)
+                or not price > 0):
+            raise InvalidItemPriceError(price)
+        try:
+            cents = to_cents(price)
+        except OverflowError:
+            cents = MAX_CENTS + 1
+        if not 0 < cents <= MAX_CENTS:
+            raise InvalidItemPriceError(price)
+        self._freeze(name, cents)
+
+    def _freeze(self, name, cents):
+        """Set the attributes of a new item."""
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'cents', cents)
+        object.__setattr__(self, 'order', cents_order(cents))
+        object.__setattr__(self, '_hash', hash((name, cents)))
+
+    @staticmethod
+    def check_name(name):
+        """Check that the item name is a string."""
         if name is None:
             raise InvalidItemNameError(name)
         if not isinstance(name, str):
             raise InvalidItemNameError(name)
-        self.name = name
-        if not isinstance(price, (float, int)) or not price > 0:
-            raise InvalidItemPriceError(price)
-        self.price = round(price, 2)
+
+    @classmethod
+    def from_cents(cls, name, cents):
+        """Return an item whose price is given in integer cents."""
+        cls.check_name(name)
+        if not isinstance(cents, int) or not 0 < cents <= MAX_CENTS:
+            raise InvalidItemPriceError(cents)
+        item = cls.__new__(cls)
+        item._freeze(name, cents)
+        return item
+
+    @classmethod
+    def trusted(cls, name, cents):
+        """Return an item from a name and integer cents known to be
+        valid, without checking them unless in debug mode."""
+        if debug.DEBUG:
+            return cls.from_cents(name, cents)
+        item = cls.__new__(cls)
+        item._freeze(name, cents)
+        return item
+
+    @classmethod
+    def interned(cls, name, price):
+        """Return the shared item with this name and price, creating it
+        if no live item has them yet."""
+        item = cls(name, price)
+        return cls._interned.setdefault((name, item.cents), item)
+
+    def __setattr__(self, attr, value):
+        """Refuse to change an item."""
+        raise AttributeError(f'Item is immutable (cannot set {attr}).')
+
+    def __delattr__(self, attr):
+        """Refuse to change an item."""
+        raise AttributeError(f'Item is immutable (cannot delete {attr}).')
+
+    def __reduce__(self):
+        """Return how to pickle the item."""
+        return Item.trusted, (self.name, self.cents)
+
+    @property
+    def price(self):
+        """Return the price of the item in dollars."""
+        return self.cents / 100
 
     def get_order(self):
         """Return the order of magnitude of the price of the item."""
-        return math.floor(round(math.log(self.price, 10), 10))
+        return self.order
 
     def get_price_str(self, quantity=None, hide_price=False, order=None):
         """Return the price of the item as a string."""
-        # price
         if order is None:
-            order = self.get_order()
-        prc_str = '${:0' + str(order + 4) + '.2f}'
-        prc_str = prc_str.format(self.price * (quantity or 1))
+            order = self.order
         if hide_price:
-            prc_str = f'${"?" * (order + 1)}.??'
-        return f'{prc_str}'
+            return hidden_cents(order + 1)
+        return format_cents(self.cents * (quantity or 1), order + 1)
 
     def get_list_item_str(self, quantity=None, leading_dash=True):
         """Return the item as a string for a shopping list."""
@@ -55,20 +139,123 @@ class Item:
         """Return True if the item is equal to the other item,
         False otherwise."""
         return isinstance(other, Item) and self.name == other.name\
-            and self.price == other.price
+            and self.cents == other.cents
+
+    def __hash__(self):
+        """Return the hash of the item."""
+        return self._hash
 
 
 class ItemPool:
     """This class represents a pool of items."""
-    def __init__(self, items=None):
+    def __init__(self, items=None, validate=True):
         if not items:
             items = {}
+        if validate:
+            self.check_items(items)
+        self._sorted_names = None
+        self._trie = None
+        self._ngrams = None
+        self._layout = None
+        self._weights = {}
+        self._sampler = None
+        self.log = None
+        self._load(items)
+
+    @classmethod
+    def from_validated(cls, items):
+        """Return a pool of a name to Item dictionary known to be valid,
+        without checking it unless in debug mode."""
+        return cls(items, validate=debug.DEBUG)
+
+    @staticmethod
+    def check_items(items):
+        """Check that items is a dictionary of names to Item instances."""
         if not isinstance(items, dict):
             raise InvalidItemPoolError()
         for key, val in items.items():
             if not isinstance(key, str) or not isinstance(val, Item):
                 raise InvalidItemPoolError()
-        self.items = items
+
+    @classmethod
+    def from_csv(cls, path, report=None):
+        """Return a new pool loaded from a CSV catalog file, counting
+        the rows that could not be loaded in report if one is given."""
+        pool = cls()
+        pool.import_catalog(path, report, 'csv')
+        return pool
+
+    @classmethod
+    def from_jsonl(cls, path, report=None):
+        """Return a new pool loaded from a JSON Lines catalog file,
+        counting the rows that could not be loaded in report if one is
+        given."""
+        pool = cls()
+        pool.import_catalog(path, report, 'jsonl')
+        return pool
+
+    def import_catalog(self, path, report=None, file_format=None):
+        """Add the items of a catalog file to the pool and return the
+        LoadReport of the import.
+
+        The file is streamed record by record; see read_catalog for the
+        formats."""
+        if report is None:
+            report = LoadReport()
+        unreadable = ValidationReport()
+        return self.load_records(
+            read_catalog(path, unreadable, file_format), report, unreadable)
+
+    def load_records(self, records, report, unreadable=None):
+        """Add the items of (row, name, price) records to the pool and
+        return report, where the rows that failed are counted.
+
+        The records are validated in batches of LOAD_BATCH. The rows
+        that the reader of records rejected into the unreadable
+        ValidationReport are counted in row order with the others."""
+        if unreadable is None:
+            unreadable = ValidationReport()
+        records = iter(records)
+        while True:
+            batch = list(islice(records, LOAD_BATCH))
+            valid, rejected = validate_records(
+                batch, self._known([name for _, name, _ in batch]))
+            report.merge(unreadable, rejected)
+            unreadable.clear()
+            if not batch:
+                return report
+            self.add_validated(valid)
+            report.loaded += len(valid)
+
+    def add_items(self, pairs):
+        """Add the valid items of a batch of (name, price) pairs to the
+        pool and return the ValidationReport of the others, with rows
+        counted from 0."""
+        pairs = list(pairs)
+        valid, rejected = validate_items(
+            pairs, self._known([name for name, _ in pairs]))
+        self.add_validated(valid)
+        return rejected
+
+    def _known(self, names):
+        """Return the set of the names among names that are already in
+        the pool."""
+        items = self.items
+        return {name for name in names
+                if isinstance(name, str) and name in items}
+
+    def add_validated(self, valid):
+        """Add the items of (row, name, cents) records known to be valid
+        and new to the pool, without the checks of add_item unless in
+        debug mode."""
+        if debug.DEBUG:
+            for _, name, cents in valid:
+                self.add_item(Item.from_cents(name, cents))
+            return
+        for _, name, cents in valid:
+            item = Item.trusted(name, cents)
+            self._store(item)
+            self._added(item)
 
     def add_item(self, item):
         """Add an item to the pool."""
@@ -78,7 +265,8 @@ class ItemPool:
             raise InvalidItemNameError(item.name)
         if item.name in self.items:
             raise DuplicateItemError()
-        self.items[item.name] = item
+        self._store(item)
+        self._added(item)
 
     def remove_item(self, item_name):
         """Remove an item from the pool."""
@@ -88,16 +276,179 @@ class ItemPool:
             raise InvalidItemNameError(item_name)
         if item_name not in self.items:
             raise NonExistingItemError(item_name)
+        item = self.items[item_name]
+        self._discard(item_name)
+        self._removed(item)
+
+    def _added(self, item):
+        """Update the views derived from the pool and its mutation log
+        after an addition."""
+        if self._sorted_names is not None:
+            self._sorted_names.add(item.name)
+        if self._trie is not None:
+            self._trie.add(item.name)
+        if self._ngrams is not None:
+            self._ngrams.add(item.name)
+        if self._layout is not None:
+            self._layout[0].add(len(item.name))
+            self._layout[1].add(item.get_order())
+        if self._sampler is not None:
+            self._sampler.add(item.name, 1)
+        if self.log is not None:
+            self.log.log_add(item)
+
+    def _removed(self, item):
+        """Update the views derived from the pool and its mutation log
+        after a removal."""
+        if self._sorted_names is not None:
+            self._sorted_names.remove(item.name)
+        if self._trie is not None:
+            self._trie.remove(item.name)
+        if self._ngrams is not None:
+            self._ngrams.remove(item.name)
+        if self._layout is not None:
+            self._layout[0].discard(len(item.name))
+            self._layout[1].discard(item.get_order())
+        self._weights.pop(item.name, None)
+        if self._sampler is not None:
+            self._sampler.remove(item.name)
+        if self.log is not None:
+            self.log.log_remove(item.name)
+
+    def __getstate__(self):
+        """Return the state to pickle: copies of the pool do not append
+        to its mutation log."""
+        state = self.__dict__.copy()
+        state['log'] = None
+        return state
+
+    def get_weight(self, item_name):
+        """Return the sampling weight of an item, 1 unless set."""
+        if item_name not in self.items:
+            raise NonExistingItemError(item_name)
+        return self._weights.get(item_name, 1)
+
+    def set_weight(self, item_name, weight):
+        """Set the sampling weight of an item used by weighted
+        sampling."""
+        if item_name not in self.items:
+            raise NonExistingItemError(item_name)
+        if (isinstance(weight, bool) or not isinstance(weight, (int, float))
+                or not 0 < weight < math.inf):
+            raise InvalidItemWeightError(weight)
+        self._weights[item_name] = weight
+        if self._sampler is not None:
+            self._sampler.set_weight(item_name, weight)
+
+    def weighted_sampler(self):
+        """Return the WeightedSampler over the item names.
+
+        The sampler is built on first use and then kept up to date by
+        add_item, remove_item and set_weight."""
+        if self._sampler is None:
+            weights = self._weights
+            self._sampler = WeightedSampler(
+                (name, weights.get(name, 1)) for name in self.items)
+        return self._sampler
+
+    def sorted_names(self):
+        """Return the SortedNames index over the item names.
+
+        The index is built on first use and then kept up to date by
+        add_item and remove_item."""
+        if self._sorted_names is None:
+            self._sorted_names = SortedNames(self.items)
+        return self._sorted_names
+
+    def name_trie(self):
+        """Return the RadixTree over the item names.
+
+        The tree is built on first use and then kept up to date by
+        add_item and remove_item."""
+        if self._trie is None:
+            self._trie = RadixTree(self.items)
+        return self._trie
+
+    def ngram_index(self):
+        """Return the TrigramIndex over the item names.
+
+        The index is built on first use and then kept up to date by
+        add_item and remove_item."""
+        if self._ngrams is None:
+            self._ngrams = TrigramIndex(self.items)
+        return self._ngrams
+
+    def layout(self):
+        """Return the length of the longest item name and the highest
+        price order in the pool, neither lower than 0.
+
+        Both come from counted multisets that are built on first use
+        and then kept up to date by add_item and remove_item."""
+        if self._layout is None:
+            names, orders = MaxCounter(), MaxCounter()
+            for item in self.iter_items():
+                names.add(len(item.name))
+                orders.add(item.get_order())
+            self._layout = names, orders
+        names, orders = self._layout
+        return names.max(0), max(orders.max(0), 0)
+
+    def _load(self, items):
+        """Copy an already validated items dictionary into the pool.
+
+        Next to the name dictionary the pool keeps the items in a slot
+        list, so that items can be picked by position."""
+        self.items = dict(items)
+        self._slots = list(items.values())
+        self._positions = {name: slot for slot, name in enumerate(items)}
+
+    def _store(self, item):
+        """Store an already validated item."""
+        self.items[item.name] = item
+        self._positions[item.name] = len(self._slots)
+        self._slots.append(item)
+
+    def _discard(self, item_name):
+        """Drop an item known to be in the pool.
+
+        The last slot is moved into the freed one, so removal is O(1)."""
         del self.items[item_name]
+        slot = self._positions.pop(item_name)
+        last = self._slots.pop()
+        if slot < len(self._slots):
+            self._slots[slot] = last
+            self._positions[last.name] = slot
+
+    def item_at(self, slot):
+        """Return the item in the given slot."""
+        return self._slots[slot]
+
+    def iter_items(self):
+        """Iterate over the items of the pool in slot order."""
+        return map(self.item_at, range(self.get_size()))
+
+    def price_column(self):
+        """Return a copy of the item prices in cents, in slot order."""
+        return array('q', [item.cents for item in self._slots])
 
     def get_size(self):
         """Return the size of the pool."""
-        return len(self.items)
+        return len(self._slots)
+
+    def sample_items(self, sample_size, rng=random, weighted=False):
+        """Return a sample of items from the pool, drawn with rng (a
+        random.Random instance or the random module).
 
-    def sample_items(self, sample_size):
-        """Return a sample of items from the pool."""
-        return random.sample(list(self.items.values()),
-                             min(sample_size, len(self.items)))
+        Only the sampled slots are touched, so this is O(sample_size)
+        whatever the size of the pool. If weighted is True the items are
+        drawn in proportion to their weights in O(sample_size log n)."""
+        size = self.get_size()
+        if weighted:
+            names = self.weighted_sampler().sample(min(sample_size, size),
+                                                   rng)
+            return [self.items[name] for name in names]
+        return [self.item_at(slot) for slot in
+                rng.sample(range(size), min(sample_size, size))]
 
     def __repr__(self):
         """Return the string representation of the pool."""
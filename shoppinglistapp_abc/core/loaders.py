@@ -0,0 +1,139 @@
+"""This module contains the catalog readers used by the ItemPool
+loaders and the LoadReport class.
+
+A reader is a generator yielding one (row, name, price) record at a
+time, so a catalog is streamed into the pool without being held in
+memory. Records that cannot be read are passed to the reject method of
+a report (a LoadReport or a ValidationReport) instead of stopping the
+import."""
+import csv
+import json
+import os
+from itertools import chain
+from operator import itemgetter
+
+from shoppinglistapp.core.validation import RECORD_INVALID, ValidationReport
+
+MAX_REPORTED_ERRORS = 20
+CSV_HEADER = ['name', 'price']
+
+
+class LoadReport:
+    """This class represents the outcome of a catalog import.
+
+    All rejected rows are counted but only the first max_errors are
+    kept, in a ValidationReport, so the report stays small."""
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.loaded = 0
+        self.rejected = 0
+        self.errors = ValidationReport()
+        self.max_errors = max_errors
+
+    def reject(self, row, code, value):
+        """Count a rejected row."""
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.reject(row, code, value)
+
+    def merge(self, *reports, first_row=0):
+        """Count the rejected rows of ValidationReports in row order,
+        shifting their rows by first_row."""
+        for row, code, value in sorted(chain(*reports),
+                                       key=itemgetter(0)):
+            self.reject(first_row + row, code, value)
+
+    def summary(self):
+        """Return the report as a multi-line string."""
+        lines = [f'Imported {self.loaded} items, '
+                 f'rejected {self.rejected} rows.']
+        lines.extend(self.errors.messages())
+        if self.rejected > len(self.errors):
+            lines.append(f'... and {self.rejected - len(self.errors)} '
+                         f'more.')
+        return '\n'.join(lines)
+
+
+def read_csv(stream, report, header=True):
+    """Yield the records of a CSV catalog of name,price rows.
+
+    If header is True a first row reading name,price is skipped. Rows
+    the csv module cannot parse, such as ones with a field over its
+    field_size_limit, are rejected with the parser's message."""
+    reader = csv.reader(stream)
+    row = 0
+    while True:
+        row += 1
+        try:
+            fields = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            report.reject(row, RECORD_INVALID, str(error))
+            continue
+        if not fields:
+            continue
+        if len(fields) != 2:
+            report.reject(row, RECORD_INVALID, ','.join(fields))
+            continue
+        if header and row == 1 and [
+                field.strip().lower() for field in fields] == CSV_HEADER:
+            continue
+        yield row, fields[0], fields[1]
+
+
+def read_jsonl(stream, report):
+    """Yield the records of a JSON Lines catalog of
+    {"name": ..., "price": ...} objects."""
+    for row, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            name, price = record['name'], record['price']
+        except (ValueError, TypeError, KeyError):
+            report.reject(row, RECORD_INVALID, line.strip())
+        else:
+            yield row, name, price
+
+
+READERS = {'.csv': read_csv, '.jsonl': read_jsonl, '.ndjson': read_jsonl}
+
+
+def catalog_format(path, file_format=None):
+    """Return the READERS key of file_format ('csv' or 'jsonl') or, if
+    it is None, of the format told by the extension of path."""
+    if file_format is None:
+        file_format = os.path.splitext(path)[1]
+    key = '.' + file_format.lstrip('.').lower()
+    if key not in READERS:
+        raise ValueError(f'Unknown catalog format "{file_format}".')
+    return key
+
+
+def read_catalog(path, report, file_format=None):
+    """Yield the records of a catalog file (see catalog_format)."""
+    reader = READERS[catalog_format(path, file_format)]
+    with open(path, newline='', encoding='utf-8') as stream:
+        yield from reader(stream, report)
+
+
+def chunk_ranges(path, chunk_bytes):
+    """Return the (start, stop) byte ranges of chunks of about
+    chunk_bytes bytes of a catalog file, each ending after a newline.
+
+    Records must then fit on one line, as in JSON Lines files and CSV
+    files without quoted newlines."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as stream:
+        start = 0
+        while start < size:
+            stop = start + chunk_bytes
+            if stop < size:
+                stream.seek(stop - 1)
+                stream.readline()
+                stop = stream.tell()
+            stop = min(stop, size)
+            ranges.append((start, stop))
+            start = stop
+    return ranges
@@ -0,0 +1,49 @@
+"""This module contains the helpers for fixed-point money amounts.
+
+Amounts are kept as integer numbers of cents. Dollar values (floats,
+integers or strings) are only converted when they enter the app and
+cents are only turned back into '$x.yy' strings when rendered."""
+
+# largest price in cents, kept in signed 64-bit columns, snapshots and
+# log records
+MAX_CENTS = (1 << 63) - 1
+# '$x.yy' %-templates, by number of dollar digits
+_PRICE_TEMPLATES = {}
+# masked '$?.??' strings, by number of dollar digits
+_HIDDEN_PRICES = {}
+
+
+def to_cents(amount):
+    """Return a dollar amount as an integer number of cents.
+
+    Raise ValueError (or TypeError) if the amount cannot be parsed."""
+    if isinstance(amount, int):
+        return amount * 100
+    return round(round(float(amount), 2) * 100)
+
+
+def cents_order(cents):
+    """Return the order of magnitude of a positive amount of cents
+    in dollars (0 for $1.00 to $9.99, -1 for $0.10 to $0.99, ...)."""
+    return len(str(cents)) - 3
+
+
+def format_cents(cents, digits=1):
+    """Return cents as a '$x.yy' string with at least digits dollar
+    digits, zero-padded on the left."""
+    template = _PRICE_TEMPLATES.get(digits)
+    if template is None:
+        template = '$%0' + str(max(digits, 1)) + 'd.%02d'
+        _PRICE_TEMPLATES[digits] = template
+    if cents < 0:
+        return '$-' + (template % divmod(-cents, 100))[1:]
+    return template % divmod(cents, 100)
+
+
+def hidden_cents(digits=1):
+    """Return a masked '$?.??' string with digits question marks
+    before the decimal point."""
+    hidden = _HIDDEN_PRICES.get(digits)
+    if hidden is None:
+        hidden = _HIDDEN_PRICES[digits] = '$' + '?' * digits + '.??'
+    return hidden
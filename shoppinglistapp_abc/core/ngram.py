@@ -0,0 +1,134 @@
+"""This module contains the TrigramIndex class."""
+
+# dead ids left in the posting lists before they are rebuilt, at least
+MIN_REBUILD = 1024
+# a posting list longer than this many times the candidates left is not
+# intersected: the candidates are checked against the text instead
+INTERSECT_RATIO = 8
+
+
+def trigrams(text):
+    """Return the set of the 3 character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PostingList:
+    """This class represents an increasing list of ids stored as the
+    varint encoded gaps between them."""
+    __slots__ = ('data', 'last', 'count')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.last = 0
+        self.count = 0
+
+    def append(self, ident):
+        """Append an id larger than the last one."""
+        gap = ident - self.last
+        self.last = ident
+        self.count += 1
+        data = self.data
+        while gap >= 0x80:
+            data.append(gap & 0x7f | 0x80)
+            gap >>= 7
+        data.append(gap)
+
+    def __iter__(self):
+        """Iterate over the ids."""
+        ident = gap = shift = 0
+        for byte in self.data:
+            gap |= (byte & 0x7f) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                ident += gap
+                yield ident
+                gap = shift = 0
+
+    def __len__(self):
+        """Return the number of ids."""
+        return self.count
+
+
+class TrigramIndex:
+    """This class represents a set of names indexed by the trigrams of
+    their case folded form, for case insensitive substring search.
+
+    Every name added gets a new id, appended to the posting list of
+    each of its trigrams. Removing a name only forgets its id; the
+    posting lists are rebuilt once they hold more dead ids than live
+    ones, so updates cost O(length of the name) amortized."""
+    def __init__(self, names=()):
+        self._rebuild(names)
+
+    def add(self, name):
+        """Insert a name, if it is not in the index."""
+        if name in self._ids:
+            return
+        ident = self._next
+        self._next += 1
+        self._ids[name] = ident
+        self._names[ident] = name
+        postings = self._postings
+        for gram in trigrams(name.casefold()):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = PostingList()
+            posting.append(ident)
+
+    def remove(self, name):
+        """Remove a name, raise ValueError if it is missing."""
+        ident = self._ids.pop(name, None)
+        if ident is None:
+            raise ValueError(name)
+        del self._names[ident]
+        self._dead += 1
+        if self._dead > max(len(self._ids), MIN_REBUILD):
+            self._rebuild(list(self._ids))
+
+    def _rebuild(self, names):
+        """Index the names from scratch."""
+        self._postings = {}
+        self._ids = {}
+        self._names = {}
+        self._next = 0
+        self._dead = 0
+        for name in names:
+            self.add(name)
+
+    def search(self, text):
+        """Iterate over the names containing text, ignoring case.
+
+        The posting lists of the trigrams of text are intersected from
+        the shortest and the names left are checked against text. Text
+        shorter than 3 characters is looked for in every name."""
+        folded = text.casefold()
+        grams = trigrams(folded)
+        if grams:
+            postings = [self._postings.get(gram) for gram in grams]
+            if None in postings:
+                return
+            postings.sort(key=len)
+            idents = set(postings[0])
+            for posting in postings[1:]:
+                if len(posting) > INTERSECT_RATIO * len(idents):
+                    break
+                idents.intersection_update(posting)
+            names = [self._names.get(ident) for ident in sorted(idents)]
+        else:
+            names = list(self._names.values())
+        for name in names:
+            if name is not None and folded in name.casefold():
+                yield name
+
+    def __contains__(self, name):
+        """Return True if the name is in the index."""
+        return name in self._ids
+
+    def __len__(self):
+        """Return the number of names."""
+        return len(self._ids)
+
+    def posting_bytes(self):
+        """Return the size of the encoded posting lists, in bytes."""
+        return sum(len(posting.data) for posting in self._postings.values())
@@ -0,0 +1,210 @@
+"""This module contains the parallel shopping list generators and the
+parallel catalog importer.
+
+The lists are split into tasks of task_size lists. Every task draws
+from its own random stream, seeded from the master seed and the task
+number, so the output for a seed is the same whatever the number of
+workers. The price column of the pool is shipped to every worker once,
+when the worker starts, instead of with every task.
+
+A catalog file is split into byte ranges ending on record boundaries
+that the workers parse and validate; the parent adds the items to the
+pool in file order, so an import gives the same pool and report as a
+sequential one."""
+import hashlib
+import io
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from shoppinglistapp.core.batch import (ShoppingListBatch, check_size,
+                                        draw_lines, line_totals, numpy,
+                                        price_array)
+from shoppinglistapp.core.loaders import (READERS, LoadReport,
+                                          catalog_format, chunk_ranges,
+                                          read_csv)
+from shoppinglistapp.core.validation import DUPLICATE, ValidationReport,\
+    validate_records
+
+TASK_SIZE = 10_000
+CHUNK_BYTES = 16 << 20
+# catalog of the current worker process, set by _init_worker
+_WORKER = {}
+
+
+def task_seed(seed, task):
+    """Return the seed of the random stream of the given task."""
+    digest = hashlib.blake2b(f'{seed}/{task}'.encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def _init_worker(prices, use_numpy):
+    """Keep the catalog sent to a new worker process."""
+    _WORKER['prices'] = prices
+    _WORKER['use_numpy'] = use_numpy
+
+
+def _draw_task(prices, use_numpy, task, count, size, seed, keep_lines):
+    """Draw the lists of one task and return their totals, preceded
+    by their slots, quantities and offsets if keep_lines is True."""
+    slots, quantities, offsets = draw_lines(len(prices), count, size,
+                                            task_seed(seed, task),
+                                            use_numpy)
+    totals = line_totals(prices, slots, quantities, offsets)
+    if keep_lines:
+        return slots, quantities, offsets, totals
+    return (totals,)
+
+
+def _worker_task(args):
+    """Draw the lists of one task with the catalog of the worker."""
+    return _draw_task(_WORKER['prices'], _WORKER['use_numpy'], *args)
+
+
+def _run_tasks(item_pool, count, size, seed, workers, task_size,
+               use_numpy, keep_lines):
+    """Return the prices and the per-task results of a parallel run."""
+    check_size(item_pool.get_size(), size)
+    if not isinstance(task_size, int) or task_size < 1:
+        raise ValueError()
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    prices = price_array(item_pool, use_numpy)
+    tasks = [(task, min(task_size, count - start), size, seed, keep_lines)
+             for task, start in enumerate(range(0, count, task_size))]
+    if workers == 1:
+        return prices, [_draw_task(prices, use_numpy, *args)
+                        for args in tasks]
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(prices, use_numpy)) as executor:
+        return prices, list(executor.map(_worker_task, tasks))
+
+
+def _concat(parts, use_numpy, typecode):
+    """Join the arrays returned by the tasks."""
+    if use_numpy:
+        if not parts:
+            return numpy.zeros(0, numpy.int64)
+        return numpy.concatenate(parts)
+    joined = array(typecode)
+    for part in parts:
+        joined.extend(part)
+    return joined
+
+
+def generate_parallel(item_pool, count, size=None, seed=0, workers=None,
+                      task_size=TASK_SIZE, use_numpy=None):
+    """Return a ShoppingListBatch of count random shopping lists drawn
+    by up to workers processes (one per CPU if workers is None).
+
+    The batch depends on seed, size and task_size only."""
+    prices, results = _run_tasks(item_pool, count, size, seed, workers,
+                                 task_size, use_numpy, keep_lines=True)
+    use_numpy = not isinstance(prices, array)
+    offsets = [numpy.zeros(1, numpy.int64) if use_numpy else array('q', [0])]
+    base = 0
+    for _, _, task_offsets, _ in results:
+        if use_numpy:
+            offsets.append(task_offsets[1:] + base)
+        else:
+            offsets.append(array('q', [offset + base
+                                       for offset in task_offsets[1:]]))
+        base += int(task_offsets[-1])
+    return ShoppingListBatch(
+        item_pool, prices,
+        _concat([result[0] for result in results], use_numpy, 'q'),
+        _concat([result[1] for result in results], use_numpy, 'b'),
+        _concat(offsets, use_numpy, 'q'),
+        _concat([result[3] for result in results], use_numpy, 'q'))
+
+
+def price_parallel(item_pool, count, size=None, seed=0, workers=None,
+                   task_size=TASK_SIZE, use_numpy=None):
+    """Return the totals in cents of the count lists that
+    generate_parallel draws with the same arguments, without sending
+    the lines back from the workers."""
+    prices, results = _run_tasks(item_pool, count, size, seed, workers,
+                                 task_size, use_numpy, keep_lines=False)
+    return _concat([result[0] for result in results],
+                   not isinstance(prices, array), 'q')
+
+
+def _parse_chunk(path, start, stop, file_format, max_errors):
+    """Parse and validate the records of one byte range of a catalog.
+
+    Return the number of lines of the range, the (row, name, cents) of
+    the valid records and the LoadReport of the others, with rows
+    counted from the start of the range. Names repeated within the
+    range are already rejected."""
+    reader = READERS[file_format]
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        text = stream.read(stop - start).decode('utf-8')
+    unreadable = ValidationReport()
+    if reader is read_csv:
+        records = read_csv(io.StringIO(text, newline=''), unreadable,
+                           header=start == 0)
+    else:
+        records = reader(io.StringIO(text, newline=''), unreadable)
+    valid, rejected = validate_records(records)
+    report = LoadReport(max_errors)
+    report.merge(unreadable, rejected)
+    return text.count('\n'), valid, report
+
+
+def _merge_chunk(item_pool, chunk, first_row, report):
+    """Add the items of a parsed chunk to the pool and its rejected rows
+    to report, in row order. Return the number of lines of the chunk."""
+    lines, valid, chunk_report = chunk
+    rejected = list(chunk_report.errors)
+    known = item_pool.items
+    fresh = []
+    for record in valid:
+        if record[1] in known:
+            rejected.append((record[0], DUPLICATE, record[1]))
+        else:
+            fresh.append(record)
+    item_pool.add_validated(fresh)
+    report.loaded += len(fresh)
+    rejected.sort(key=lambda rejection: rejection[0])
+    for row, code, value in rejected:
+        report.reject(first_row + row, code, value)
+    report.rejected += chunk_report.rejected - len(chunk_report.errors)
+    return lines
+
+
+def import_catalog(item_pool, path, report=None, file_format=None,
+                   workers=None, chunk_bytes=CHUNK_BYTES):
+    """Add the items of a catalog file to the pool, parsing chunks of
+    about chunk_bytes bytes in up to workers processes, and return the
+    LoadReport of the import.
+
+    The pool and the report are the same as with
+    ItemPool.import_catalog whatever the number of workers. Records
+    must fit on one line (see chunk_ranges)."""
+    if report is None:
+        report = LoadReport()
+    file_format = catalog_format(path, file_format)
+    chunks = [(path, start, stop, file_format, report.max_errors)
+              for start, stop in chunk_ranges(path, chunk_bytes)]
+    first_row = 0
+    if workers == 1:
+        for args in chunks:
+            first_row += _merge_chunk(item_pool, _parse_chunk(*args),
+                                      first_row, report)
+        return report
+    # keep a bounded number of parsed chunks waiting to be merged
+    window = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for args in chunks:
+            pending.append(executor.submit(_parse_chunk, *args))
+            if len(pending) >= window:
+                first_row += _merge_chunk(item_pool,
+                                          pending.popleft().result(),
+                                          first_row, report)
+        while pending:
+            first_row += _merge_chunk(item_pool, pending.popleft().result(),
+                                      first_row, report)
+    return report
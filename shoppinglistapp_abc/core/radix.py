@@ -0,0 +1,144 @@
+"""This module contains the RadixTree class."""
+
+
+class RadixNode:
+    """This class represents a node of a RadixTree: the label of the
+    edge leading to it, its children by the first character of their
+    label, and whether a name ends at it."""
+    __slots__ = ('label', 'children', 'terminal')
+
+    def __init__(self, label='', children=None, terminal=False):
+        self.label = label
+        self.children = {} if children is None else children
+        self.terminal = terminal
+
+
+def common_length(first, second):
+    """Return the length of the common prefix of two strings."""
+    size = min(len(first), len(second))
+    index = 0
+    while index < size and first[index] == second[index]:
+        index += 1
+    return index
+
+
+def iter_children(spelled, node):
+    """Yield the (name spelled, child) of the children of a node that
+    spells a name, in order."""
+    children = node.children
+    for key in sorted(children):
+        child = children[key]
+        yield spelled + child.label, child
+
+
+class RadixTree:
+    """This class represents a set of names in a compressed trie.
+
+    Chains of nodes with a single child are merged into one edge, so
+    every internal node that no name ends at branches. Finding the
+    names under a prefix walks the prefix and then only the subtree of
+    the names returned, in name order."""
+    def __init__(self, names=()):
+        self._root = RadixNode()
+        self._len = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        """Insert a name, if it is not in the tree."""
+        node = self._root
+        rest = name
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                node.children[rest[0]] = RadixNode(rest, terminal=True)
+                self._len += 1
+                return
+            common = common_length(child.label, rest)
+            if common < len(child.label):
+                middle = RadixNode(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                node.children[rest[0]] = middle
+                child = middle
+            node = child
+            rest = rest[common:]
+        if not node.terminal:
+            node.terminal = True
+            self._len += 1
+
+    def remove(self, name):
+        """Remove a name, raise ValueError if it is missing."""
+        parent = None
+        node = self._root
+        rest = name
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None or not rest.startswith(child.label):
+                raise ValueError(name)
+            parent, node = node, child
+            rest = rest[len(child.label):]
+        if not node.terminal:
+            raise ValueError(name)
+        node.terminal = False
+        self._len -= 1
+        if parent is None:
+            return
+        if not node.children:
+            del parent.children[node.label[0]]
+            node = parent
+        if node is not self._root and not node.terminal\
+                and len(node.children) == 1:
+            child, = node.children.values()
+            node.label += child.label
+            node.children = child.children
+            node.terminal = child.terminal
+
+    def _find(self, prefix):
+        """Return the node under which the names starting with prefix
+        are and the name that node spells, or (None, None)."""
+        node = self._root
+        spelled = ''
+        rest = prefix
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                return None, None
+            if child.label.startswith(rest):
+                return child, spelled + child.label
+            if not rest.startswith(child.label):
+                return None, None
+            node = child
+            spelled += child.label
+            rest = rest[len(child.label):]
+        return node, spelled
+
+    def iter_prefix(self, prefix=''):
+        """Iterate over the names starting with prefix, in order."""
+        node, spelled = self._find(prefix)
+        if node is None:
+            return
+        stack = [iter([(spelled, node)])]
+        while stack:
+            for spelled, node in stack[-1]:
+                break
+            else:
+                stack.pop()
+                continue
+            if node.terminal:
+                yield spelled
+            if node.children:
+                stack.append(iter_children(spelled, node))
+
+    def __contains__(self, name):
+        """Return True if the name is in the tree."""
+        node, spelled = self._find(name)
+        return node is not None and spelled == name and node.terminal
+
+    def __iter__(self):
+        """Iterate over the names in order."""
+        return self.iter_prefix()
+
+    def __len__(self):
+        """Return the number of names."""
+        return self._len
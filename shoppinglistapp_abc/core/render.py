@@ -0,0 +1,75 @@
+"""This module contains the line renderers used by the AppCLI class.
+
+The renderers check their input and work out the column widths when
+called, then return generators yielding one line at a time (newline
+included), so the output can be written out while it is produced
+instead of being built as one string first."""
+from shoppinglistapp.core.money import format_cents
+
+CHUNK_LINES = 1024
+
+
+def iter_item_lines(item_pool, start=0, stop=None):
+    """Return an iterator over the lines showing the items in the item
+    pool, from the start-th to the stop-th item in name order.
+
+    Column widths always come from the whole pool."""
+    max_name, max_order = item_pool.layout()
+    return _item_lines(item_pool, max_name, max_order, start, stop)
+
+
+def _item_lines(item_pool, max_name, max_order, start, stop):
+    """Yield the lines of iter_item_lines."""
+    yield 'ITEMS\n'
+    for item_name in item_pool.sorted_names().islice(start, stop):
+        item = item_pool.items[item_name]
+        padding = (max_name - len(item_name) + 3) * '.'
+        yield (f'{item.get_list_item_str(quantity=None)} {padding} '
+               f'{item.get_price_str(order=max_order)}\n')
+
+
+def iter_list_lines(shopping_list, mask_index=None, start=0, stop=None):
+    """Return an iterator over the lines showing the shopping list, with
+    the price of the mask_index-th line hidden. Only the start-th to
+    the stop-th lines are shown before the total.
+
+    Column widths always come from the whole list. Raise ValueError
+    right away if the list is empty."""
+    lines = shopping_list.list
+    if not lines:
+        raise ValueError('Cannot show an empty shopping list.')
+    total = shopping_list.get_total_cents()
+    max_item, max_order = shopping_list.layout()
+    start, stop, _ = slice(start, stop).indices(len(shopping_list))
+    return _list_lines(lines, total, mask_index, max_item, max_order,
+                       range(start, stop))
+
+
+def _list_lines(lines, total, mask_index, max_item, max_order, shown):
+    """Yield the lines of iter_list_lines."""
+    line_base_len = max(max_item, len('TOTAL') - 4) + (5 - 2)
+    yield 'SHOPPING LIST\n'
+    for i in shown:
+        item, quantity = lines[i]
+        hide_price = mask_index == i
+        padding = (line_base_len - len(item.name)) * '.'
+        yield (f'{item.get_list_item_str(quantity)} {padding} '
+               f'{item.get_price_str(quantity, hide_price, max_order)}\n')
+    quantity = lines[-1][1]
+    padding = (line_base_len + 2) * '.'
+    total_line = (f'TOTAL {padding} '
+                  f'{format_cents(total * quantity, max_order + 1)}')
+    yield '-' * len(total_line) + '\n'
+    yield total_line + '\n'
+
+
+def write_lines(lines, stream, chunk_lines=CHUNK_LINES):
+    """Write lines to a text stream, chunk_lines lines per write."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_lines:
+            stream.write(''.join(chunk))
+            chunk.clear()
+    if chunk:
+        stream.write(''.join(chunk))
@@ -0,0 +1,167 @@
+"""This module contains the WeightedSampler class."""
+import random
+
+
+def fraction_bits(weight):
+    """Return the number of bits after the binary point of an int or
+    float weight."""
+    return weight.as_integer_ratio()[1].bit_length() - 1
+
+
+class WeightedSampler:
+    """This class represents a set of keys with positive weights that
+    can be sampled without replacement in proportion to the weights.
+
+    The weights are kept in a Fenwick tree over key positions, so that
+    adding, removing or reweighting a key and drawing one key are all
+    O(log n). Removed keys are replaced by the last key, like the slots
+    of an ItemPool.
+
+    The tree holds the weights as exact integers, scaled by the power
+    of two that makes every float weight whole, so weights of very
+    different sizes do not cancel out when they are added and taken
+    back."""
+    def __init__(self, weights=()):
+        self._keys = []
+        self._weights = []
+        for key, weight in weights:
+            self._keys.append(key)
+            self._weights.append(weight)
+        self._positions = {key: pos for pos, key in enumerate(self._keys)}
+        self._shift = max(map(fraction_bits, self._weights), default=0)
+        tree = [0]
+        tree.extend(map(self._scaled, self._weights))
+        for index in range(1, len(tree)):
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self._tree = tree
+
+    def __len__(self):
+        """Return the number of keys."""
+        return len(self._keys)
+
+    def __contains__(self, key):
+        """Return True if the key is in the sampler."""
+        return key in self._positions
+
+    def get_weight(self, key):
+        """Return the weight of a key, raise KeyError if it is missing."""
+        return self._weights[self._positions[key]]
+
+    def total(self):
+        """Return the sum of the weights."""
+        total = self._prefix(len(self._keys))
+        return total / (1 << self._shift) if self._shift else total
+
+    def _scaled(self, weight):
+        """Return a weight as an integer in tree units."""
+        numerator, denominator = weight.as_integer_ratio()
+        return numerator * ((1 << self._shift) // denominator)
+
+    def _rescale(self, weight):
+        """Make the tree units fine enough to hold weight exactly and
+        return it in those units."""
+        bits = fraction_bits(weight)
+        if bits > self._shift:
+            extra = bits - self._shift
+            self._tree = [value << extra for value in self._tree]
+            self._shift = bits
+        return self._scaled(weight)
+
+    def _prefix(self, count):
+        """Return the sum of the weights of the first count keys."""
+        tree = self._tree
+        total = 0
+        while count:
+            total += tree[count]
+            count &= count - 1
+        return total
+
+    def _update(self, pos, delta):
+        """Add delta to the weight of the key in position pos."""
+        tree = self._tree
+        index = pos + 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def add(self, key, weight):
+        """Add a key with the given weight."""
+        if key in self._positions:
+            raise KeyError(key)
+        scaled = self._rescale(weight)
+        index = len(self._tree)
+        low = index - (index & -index)
+        self._tree.append(self._prefix(index - 1) - self._prefix(low)
+                          + scaled)
+        self._positions[key] = len(self._keys)
+        self._keys.append(key)
+        self._weights.append(weight)
+
+    def remove(self, key):
+        """Remove a key, raise KeyError if it is missing."""
+        pos = self._positions.pop(key)
+        last = len(self._keys) - 1
+        moved_weight = self._weights[last]
+        moved_scaled = self._scaled(moved_weight)
+        if pos != last:
+            moved = self._keys[last]
+            self._update(pos, moved_scaled - self._scaled(self._weights[pos]))
+            self._keys[pos] = moved
+            self._weights[pos] = moved_weight
+            self._positions[moved] = pos
+        self._update(last, -moved_scaled)
+        self._tree.pop()
+        self._keys.pop()
+        self._weights.pop()
+
+    def set_weight(self, key, weight):
+        """Change the weight of a key, raise KeyError if it is missing."""
+        pos = self._positions[key]
+        scaled = self._rescale(weight)
+        self._update(pos, scaled - self._scaled(self._weights[pos]))
+        self._weights[pos] = weight
+
+    def _find(self, target):
+        """Return the position of the first key whose running weight
+        exceeds target."""
+        tree = self._tree
+        pos = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            index = pos + step
+            if index < len(tree) and tree[index] <= target:
+                pos = index
+                target -= tree[index]
+            step >>= 1
+        return pos
+
+    def sample(self, sample_size, rng=random):
+        """Return sample_size distinct keys drawn with rng, each draw
+        picking a key with probability proportional to its weight among
+        the keys not drawn yet.
+
+        Drawn keys are zeroed in the tree while sampling and the tree
+        nodes they touched are put back afterwards, so this is
+        O(sample_size log n). The tree is exact, so every draw lands on
+        a key not drawn yet."""
+        if sample_size > len(self._keys):
+            raise ValueError('Sample larger than the number of keys.')
+        tree = self._tree
+        saved = []
+        drawn = []
+        total = self._prefix(len(self._keys))
+        while len(drawn) < sample_size:
+            pos = self._find(rng.randrange(total))
+            drawn.append(self._keys[pos])
+            weight = self._scaled(self._weights[pos])
+            total -= weight
+            index = pos + 1
+            while index < len(tree):
+                saved.append((index, tree[index]))
+                tree[index] -= weight
+                index += index & -index
+        for index, value in reversed(saved):
+            tree[index] = value
+        return drawn
@@ -1,78 +1,196 @@
 """This module contains the ShoppingList class."""
 import random
+from collections.abc import Sequence
+from shoppinglistapp.core import debug
+from shoppinglistapp.core.items import Item
+from shoppinglistapp.core.money import cents_order
 from shoppinglistapp.core.errors import InvalidShoppingListSizeError
 
 
+class ShoppingListLines(Sequence):
+    """This class represents a read-only view of the lines of a
+    shopping list."""
+    __slots__ = ('_lines',)
+
+    def __init__(self, lines):
+        self._lines = lines
+
+    def __getitem__(self, i):
+        """Return the i-th line, or a list of the lines of a slice."""
+        return self._lines[i]
+
+    def __len__(self):
+        """Return the number of lines."""
+        return len(self._lines)
+
+    def __eq__(self, other):
+        """Return True if the lines are equal to the other sequence,
+        False otherwise."""
+        if isinstance(other, ShoppingListLines):
+            other = other._lines
+        return isinstance(other, Sequence) and self._lines == list(other)
+
+    def __repr__(self):
+        """Return the string representation of the lines."""
+        return f'ShoppingListLines({self._lines})'
+
+
 class ShoppingList:
-    """This class represents a shopping list."""
+    """This class represents a shopping list.
+
+    The list is a list of (item, quantity) lines, read through a
+    read-only view and changed only by refresh, assigning list and the
+    line editing methods. The total price is kept up to date by them,
+    so reading it does not walk the list. In debug mode every read of
+    the total is checked against a full recomputation."""
     def __init__(self, size=None, quantities=None, item_pool=None):
         self.list = []
         if item_pool is not None:
-            size, quantities = self.error_check(size, quantities, item_pool)
             self.refresh(item_pool, size, quantities)
 
-    def refresh(self, item_pool, size=None, quantities=None):
-        """Refresh the shopping list."""
+    def refresh(self, item_pool, size=None, quantities=None, rng=random,
+                weighted=False):
+        """Refresh the shopping list, drawing from rng (a random.Random
+        instance or the random module). If weighted is True the items
+        are drawn in proportion to their weights in the pool."""
+        size, quantities = self.validate(size, quantities, item_pool, rng)
+        items = item_pool.sample_items(size, rng, weighted)
+        self.list = zip(items, quantities)
+
+    def validate(self, size, quantities, item_pool, rng=random):
+        """Check the arguments and return the size and the quantities
+        to build the list from, drawing the missing ones from rng.
+
+        The quantities are padded with 1s when they are too few, and
+        returned as they are (without copying) otherwise, so they may
+        be longer than size."""
         if size is None:
-            size = random.randint(1, item_pool.get_size())
+            size = rng.randint(1, item_pool.get_size())
         if not isinstance(size, int):
             raise ValueError()
-        if isinstance(size, int):
-            if size < 1:
-                raise ValueError()
+        if size < 1:
+            raise ValueError()
         if size > item_pool.get_size():
             raise InvalidShoppingListSizeError()
         if quantities is None:
-            quantities = random.choices(range(1, 10), k=size)
+            return size, rng.choices(range(1, 10), k=size)
+        self.check_quantities(quantities)
+        if len(quantities) < size:
+            quantities = quantities + [1] * (size - len(quantities))
+        return size, quantities
+
+    @staticmethod
+    def check_quantities(quantities):
+        """Check that quantities is a list of positive ints.
+
+        Lists of plain ints are checked in bulk with C-level passes;
+        the element by element loop only runs for other types."""
         if not isinstance(quantities, list):
             raise ValueError()
+        if set(map(type, quantities)) <= {int}:
+            if quantities and min(quantities) < 1:
+                raise ValueError()
+            return
         for elem in quantities:
             if not isinstance(elem, int):
                 raise ValueError()
-            if isinstance(elem, int) and elem < 1:
+            if elem < 1:
                 raise ValueError()
-        if len(quantities) < size:
-            quantities = quantities + [1] * (size - len(quantities))
-        if len(quantities) > size:
-            quantities = quantities[:size]
-        if isinstance(size, int):
-            items_list = item_pool.sample_items(size)
-        self.list = list(zip(items_list, quantities))
 
     def error_check(self, size, quantities, item_pool):
         """Check if the arguments are valid."""
-        if size is None:
-            size = random.randint(1, item_pool.get_size())
-        if not isinstance(size, int):
+        size, quantities = self.validate(size, quantities, item_pool)
+        return size, quantities[:size]
+
+    @property
+    def list(self):
+        """Return a read-only view of the (item, quantity) lines of the
+        shopping list."""
+        return ShoppingListLines(self._lines)
+
+    @list.setter
+    def list(self, lines):
+        """Replace the lines of the shopping list with a copy of
+        lines."""
+        self._lines = list(lines)
+        self._total = self.compute_total_cents()
+        self._layout = None
+
+    @staticmethod
+    def check_line(item, quantity):
+        """Check that a line is an item with a positive int quantity."""
+        if not isinstance(item, Item):
             raise ValueError()
-        if isinstance(size, int):
-            if size < 1:
-                raise ValueError()
-        if size > item_pool.get_size():
-            raise InvalidShoppingListSizeError()
-        if quantities is None:
-            quantities = random.choices(range(1, 10), k=size)
-        if not isinstance(quantities, list):
+        if not isinstance(quantity, int) or quantity < 1:
             raise ValueError()
-        for elem in quantities:
-            if not isinstance(elem, int):
-                raise ValueError()
-            if isinstance(elem, int) and elem < 1:
-                raise ValueError()
-        if len(quantities) < size:
-            quantities = quantities + [1] * (size - len(quantities))
-        if len(quantities) > size:
-            quantities = quantities[:size]
-        return size, quantities
+
+    def add_line(self, item, quantity=1):
+        """Append a line to the shopping list."""
+        self.check_line(item, quantity)
+        self._lines.append((item, quantity))
+        self._total += item.cents * quantity
+        self._layout = None
+
+    def remove_line(self, i):
+        """Remove the i-th line of the shopping list and return it.
+
+        The total is updated in O(1); lines after i still have to be
+        shifted down by the underlying list."""
+        item, quantity = self._lines.pop(i)
+        self._total -= item.cents * quantity
+        self._layout = None
+        return item, quantity
+
+    def set_quantity(self, i, quantity):
+        """Set the quantity of the i-th line of the shopping list."""
+        item, old_quantity = self._lines[i]
+        self.check_line(item, quantity)
+        self._lines[i] = (item, quantity)
+        self._total += item.cents * (quantity - old_quantity)
+        self._layout = None
+
+    def layout(self):
+        """Return the length of the longest item name and the highest
+        price order in the list, counting the total.
+
+        The result is kept until the list changes."""
+        if self._layout is None:
+            max_name = 0
+            max_order = cents_order(self.get_total_cents())
+            for item, _ in self._lines:
+                max_name = max(max_name, len(item.name))
+                max_order = max(max_order, item.get_order())
+            self._layout = max_name, max_order
+        return self._layout
+
+    def compute_total_cents(self):
+        """Return the total price of the shopping list in cents,
+        summed over all lines."""
+        return sum(item.cents * qnt for (item, qnt) in self._lines)
+
+    def get_total_cents(self):
+        """Return the total price of the shopping list in cents."""
+        if debug.DEBUG:
+            expected = self.compute_total_cents()
+            if self._total != expected:
+                raise AssertionError(f'Running total {self._total} '
+                                     f'does not match {expected}.')
+        return self._total
+
+    def get_item_cents(self, i):
+        """Return the price of the i-th item in the shopping list
+        in cents."""
+        item, quantity = self._lines[i]
+        return item.cents * quantity
 
     def get_total_price(self):
         """Return the total price of the shopping list."""
-        return round(sum(item.price * qnt for (item, qnt) in self.list), 2)
+        return self.get_total_cents() / 100
 
     def get_item_price(self, i):
         """Return the price of the i-th item in the shopping list."""
-        return round(self.list[i][0].price * self.list[i][1], 2)
+        return self.get_item_cents(i) / 100
 
     def __len__(self):
         """Return the length of the shopping list."""
-        return len(self.list)
+        return len(self._lines)
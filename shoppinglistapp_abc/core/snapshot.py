@@ -0,0 +1,194 @@
+"""This module contains the binary snapshots of item pools and the
+SnapshotItemPool class.
+
+A snapshot file holds, after a fixed header, the price column of the
+pool in cents, the offsets of the names in the name table, an open
+addressing lookup table of slot numbers and the UTF-8 name table. The
+lookup table is keyed by the CRC-32 of the names, which unlike hash()
+is the same in every process, so opening a snapshot reads nothing but
+the header: pages are loaded by the OS when they are first used and
+shared by every process that maps the file."""
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from itertools import accumulate
+
+from shoppinglistapp.core.columnar import ColumnarItems
+from shoppinglistapp.core.errors import ReadOnlyItemPoolError
+from shoppinglistapp.core.items import Item, ItemPool
+
+MAGIC = b'SLPSNAP1'
+# magic, number of items, lookup table size, name table size
+HEADER = struct.Struct('<8sQQQ')
+
+
+def write_snapshot(item_pool, path):
+    """Write a snapshot of the item pool to path.
+
+    The snapshot is written next to path and then renamed over it, so
+    readers never see a partial file."""
+    names = [item_pool.item_at(slot).name.encode()
+             for slot in range(item_pool.get_size())]
+    offsets = array('Q', [0])
+    offsets.extend(accumulate(map(len, names)))
+    capacity = 8
+    while capacity < 2 * len(names):
+        capacity *= 2
+    table = array('q', bytes(8 * capacity))
+    mask = capacity - 1
+    for slot, key in enumerate(names):
+        index = zlib.crc32(key) & mask
+        while table[index]:
+            index = (index + 1) & mask
+        table[index] = slot + 1
+    partial = f'{path}.partial'
+    with open(partial, 'wb') as stream:
+        stream.write(HEADER.pack(MAGIC, len(names), capacity,
+                                 offsets[-1]))
+        stream.write(item_pool.price_column().tobytes())
+        stream.write(offsets.tobytes())
+        stream.write(table.tobytes())
+        for key in names:
+            stream.write(key)
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(partial, path)
+
+
+class SnapshotItemPool(ItemPool):
+    """This class represents a pool of items mapped from a snapshot.
+
+    The pool is read-only unless opened as writable, in which case
+    changes go to an in-memory overlay over the snapshot and the file
+    is never written: the overlay holds the items of the slots that
+    changed and the new slot of every name that moved or went."""
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        if self._map.size() < HEADER.size:
+            self._map.close()
+            raise ValueError(f'"{path}" is not an item pool snapshot.')
+        magic, count, capacity, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f'"{path}" is not an item pool snapshot.')
+        view = memoryview(self._map)
+        start = HEADER.size
+        self._prices = view[start:start + 8 * count].cast('q')
+        start += 8 * count
+        self._offsets = view[start:start + 8 * (count + 1)].cast('Q')
+        start += 8 * (count + 1)
+        self._table = view[start:start + 8 * capacity].cast('q')
+        self._names = view[start + 8 * capacity:]
+        self._count = count
+        self._size = count
+        self._changed = {}
+        self._moved = {}
+        self._view = ColumnarItems(self)
+        super().__init__()
+
+    @property
+    def items(self):
+        """Return a read-only name to Item mapping of the pool."""
+        return self._view
+
+    def _load(self, items):
+        """Nothing to load: the items are in the snapshot."""
+
+    def _store(self, item):
+        """Put an already validated item in a new slot of the overlay."""
+        if not self.writable:
+            raise ReadOnlyItemPoolError(self.path)
+        self._changed[self._size] = item
+        self._moved[item.name] = self._size
+        self._size += 1
+
+    def _discard(self, item_name):
+        """Drop an item known to be in the pool, moving the last slot
+        into the freed one."""
+        if not self.writable:
+            raise ReadOnlyItemPoolError(self.path)
+        slot = self.slot_of(item_name)
+        last = self._size - 1
+        if slot != last:
+            moved = self.item_at(last)
+            self._changed[slot] = moved
+            self._moved[moved.name] = slot
+        self._changed.pop(last, None)
+        self._moved[item_name] = -1
+        self._size = last
+
+    def _snapshot_slot(self, key):
+        """Return the slot of an encoded name in the snapshot, or -1."""
+        table = self._table
+        mask = len(table) - 1
+        index = zlib.crc32(key) & mask
+        while True:
+            entry = table[index]
+            if entry == 0:
+                return -1
+            start, stop = self._offsets[entry - 1], self._offsets[entry]
+            if self._names[start:stop] == key:
+                return entry - 1
+            index = (index + 1) & mask
+
+    def slot_of(self, item_name):
+        """Return the slot of the named item, or -1 if it is missing."""
+        if not isinstance(item_name, str):
+            return -1
+        slot = self._moved.get(item_name)
+        if slot is not None:
+            return slot
+        return self._snapshot_slot(item_name.encode())
+
+    def name_at(self, slot):
+        """Return the name of the item in the given slot."""
+        item = self._changed.get(slot)
+        if item is not None:
+            return item.name
+        start, stop = self._offsets[slot], self._offsets[slot + 1]
+        return str(self._names[start:stop], 'utf-8')
+
+    def item_at(self, slot):
+        """Return the Item in the given slot."""
+        item = self._changed.get(slot)
+        if item is not None:
+            return item
+        return Item.trusted(self.name_at(slot), self._prices[slot])
+
+    def price_column(self):
+        """Return a copy of the item prices in cents, in slot order."""
+        column = array('q', self._prices[:min(self._size, self._count)]
+                       .tobytes())
+        column.extend(self._changed[slot].cents
+                      for slot in range(len(column), self._size))
+        for slot, item in self._changed.items():
+            if slot < self._count:
+                column[slot] = item.cents
+        return column
+
+    def get_size(self):
+        """Return the size of the pool."""
+        return self._size
+
+    def close(self):
+        """Unmap the snapshot file."""
+        for view in (self._prices, self._offsets, self._table, self._names):
+            view.release()
+        self._map.close()
+
+    def __reduce__(self):
+        """Return how to pickle the pool: other processes map the same
+        file, so its pages are shared through the OS page cache."""
+        if self._changed or self._moved:
+            raise TypeError('Cannot pickle a snapshot pool with changes.')
+        return SnapshotItemPool, (self.path, self.writable)
+
+    def __repr__(self):
+        """Return the string representation of the pool."""
+        return f'SnapshotItemPool({self.path!r}, {self.get_size()} items)'
@@ -0,0 +1,142 @@
+"""This module contains the SortedNames class."""
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, chain, islice
+
+
+class SortedNames:
+    """This class represents a sorted list of names kept in chunks.
+
+    Adding or removing a name bisects the chunk maxima and then one
+    chunk, and only shifts the names of that chunk, so an update costs
+    O(log n + chunk_size) instead of the O(n) of a single sorted list.
+    """
+    chunk_size = 512
+
+    def __init__(self, names=()):
+        names = sorted(names)
+        self._chunks = [names[i:i + self.chunk_size]
+                        for i in range(0, len(names), self.chunk_size)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._starts = None
+        self._len = len(names)
+
+    def add(self, name):
+        """Insert a name."""
+        self._starts = None
+        self._len += 1
+        if not self._chunks:
+            self._chunks.append([name])
+            self._maxes.append(name)
+            return
+        pos = bisect_left(self._maxes, name)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._chunks[pos].append(name)
+            self._maxes[pos] = name
+        else:
+            insort(self._chunks[pos], name)
+        chunk = self._chunks[pos]
+        if len(chunk) > 2 * self.chunk_size:
+            self._chunks.insert(pos + 1, chunk[self.chunk_size:])
+            del chunk[self.chunk_size:]
+            self._maxes.insert(pos, chunk[-1])
+
+    def remove(self, name):
+        """Remove a name, raise ValueError if it is missing."""
+        pos = bisect_left(self._maxes, name)
+        if pos == len(self._maxes):
+            raise ValueError(name)
+        chunk = self._chunks[pos]
+        index = bisect_left(chunk, name)
+        if chunk[index] != name:
+            raise ValueError(name)
+        self._starts = None
+        self._len -= 1
+        del chunk[index]
+        if not chunk:
+            del self._chunks[pos]
+            del self._maxes[pos]
+        else:
+            self._maxes[pos] = chunk[-1]
+
+    def __len__(self):
+        """Return the number of names."""
+        return self._len
+
+    def __contains__(self, name):
+        """Return True if the name is in the list."""
+        pos = bisect_left(self._maxes, name)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._chunks[pos]
+        return chunk[bisect_left(chunk, name)] == name
+
+    def __iter__(self):
+        """Iterate over the names in order."""
+        return chain.from_iterable(self._chunks)
+
+    def __getitem__(self, index):
+        """Return the index-th name, or a list of names for a slice."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return list(self.islice(start, stop))
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        pos, offset = self._locate(index)
+        return self._chunks[pos][offset]
+
+    def _chunk_starts(self):
+        """Return the position of the first name of every chunk.
+
+        The positions are recomputed only after the list changed."""
+        if self._starts is None:
+            self._starts = [0]
+            self._starts.extend(accumulate(map(len, self._chunks)))
+        return self._starts
+
+    def _locate(self, index):
+        """Return the chunk and the offset in it of the index-th name."""
+        starts = self._chunk_starts()
+        pos = bisect_right(starts, index) - 1
+        return pos, index - starts[pos]
+
+    def islice(self, start=0, stop=None):
+        """Iterate over the names from the start-th to the stop-th.
+
+        Only the chunks holding the requested names are visited."""
+        start, stop, _ = slice(start, stop).indices(self._len)
+        if start >= stop:
+            return iter(())
+        pos, offset = self._locate(start)
+        chunks = self._chunks
+        names = chain(chunks[pos][offset:],
+                      chain.from_iterable(chunks[i] for i in
+                                          range(pos + 1, len(chunks))))
+        return islice(names, stop - start)
+
+    def irange(self, low=None, high=None):
+        """Iterate over the names from low (included) to high (excluded).
+
+        A bound of None leaves that end of the range open."""
+        start = 0 if low is None else self.bisect_left(low)
+        stop = self._len if high is None else self.bisect_left(high)
+        return self.islice(start, stop)
+
+    def iter_prefix(self, prefix):
+        """Iterate over the names starting with prefix."""
+        for name in self.islice(self.bisect_left(prefix)):
+            if not name.startswith(prefix):
+                break
+            yield name
+
+    def bisect_left(self, name):
+        """Return the position name would be inserted at."""
+        pos = bisect_left(self._maxes, name)
+        if pos == len(self._maxes):
+            return self._len
+        return (self._chunk_starts()[pos]
+                + bisect_left(self._chunks[pos], name))
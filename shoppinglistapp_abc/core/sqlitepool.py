@@ -0,0 +1,307 @@
+"""This module contains the SQLiteItemPool class.
+
+The items live in one table of a local SQLite database in WAL mode,
+so that several processes can read the pool while one of them writes.
+The slot of an item is the integer primary key of its row, kept dense
+by moving the last row into the slot of a removed one, so items can be
+picked by position with an index lookup instead of a table scan.
+
+Statements come from a fixed set of strings, so they stay in the
+prepared statement cache of each connection: lookups of many slots or
+names pad their IN lists to a power of two, and full scans page
+through the table by slot. A read connection is only borrowed for one
+statement and its rows, so iterating over the pool never holds one
+while the caller runs."""
+import pathlib
+import queue
+import random
+import sqlite3
+import threading
+from array import array
+from contextlib import contextmanager
+
+from shoppinglistapp.core import debug
+from shoppinglistapp.core.columnar import ColumnarItems
+from shoppinglistapp.core.errors import DuplicateItemError
+from shoppinglistapp.core.items import Item, ItemPool
+
+READERS = 4
+# statements cached by every connection
+CACHED_STATEMENTS = 64
+# slots or names looked up by one SELECT ... IN query, at most; a
+# power of two
+LOOKUP_BATCH = 512
+# rows read by one page of a full scan
+SCAN_BATCH = 4096
+
+SCHEMA = ('CREATE TABLE IF NOT EXISTS items ('
+          'slot INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, '
+          'cents INTEGER NOT NULL)')
+SELECT_SIZE = 'SELECT MAX(slot) FROM items'
+SELECT_SLOT = 'SELECT slot FROM items WHERE name = ?'
+SELECT_ITEM = 'SELECT name, cents FROM items WHERE slot = ?'
+SCAN_ITEMS = ('SELECT slot, name, cents FROM items WHERE slot >= ? '
+              'ORDER BY slot LIMIT ?')
+SELECT_PRICES = 'SELECT cents FROM items ORDER BY slot'
+INSERT_ITEM = 'INSERT INTO items (slot, name, cents) VALUES (?, ?, ?)'
+DELETE_ITEM = 'DELETE FROM items WHERE slot = ?'
+MOVE_ITEM = 'UPDATE items SET slot = ? WHERE slot = ?'
+
+
+def in_queries(template):
+    """Return the statements of a template with an IN list of each
+    power of two parameters up to LOOKUP_BATCH, by parameter count."""
+    queries = {}
+    size = 1
+    while size <= LOOKUP_BATCH:
+        queries[size] = template.format(', '.join('?' * size))
+        size *= 2
+    return queries
+
+
+SELECT_SLOTS_IN = in_queries(
+    'SELECT slot, name, cents FROM items WHERE slot IN ({})')
+SELECT_NAMES_IN = in_queries('SELECT name FROM items WHERE name IN ({})')
+
+
+def padded_batches(values):
+    """Yield the values in batches of at most LOOKUP_BATCH, padded with
+    NULLs to a power of two, which match nothing in an IN list."""
+    for start in range(0, len(values), LOOKUP_BATCH):
+        batch = values[start:start + LOOKUP_BATCH]
+        size = 1 << (len(batch) - 1).bit_length()
+        yield size, batch + [None] * (size - len(batch))
+
+
+def connect(path, read_only=False):
+    """Return a connection to the SQLite database at path that can be
+    handed from thread to thread."""
+    if read_only:
+        uri = pathlib.Path(path).absolute().as_uri() + '?mode=ro'
+        return sqlite3.connect(uri, uri=True, isolation_level=None,
+                               check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+    return sqlite3.connect(path, isolation_level=None,
+                           check_same_thread=False,
+                           cached_statements=CACHED_STATEMENTS)
+
+
+class ConnectionPool:
+    """This class represents a fixed set of read-only connections shared
+    by the threads of a process, one thread at a time each."""
+    def __init__(self, path, size=READERS):
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(connect(path, read_only=True))
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        """Lend an idle connection, waiting for one if all are busy."""
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close the connections, waiting for the busy ones."""
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+class SQLiteItems(ColumnarItems):
+    """Read-only name to Item mapping over a SQLiteItemPool."""
+    def __getitem__(self, name):
+        """Return the item with the given name."""
+        slot = self.pool.slot_of(name)
+        if slot < 0:
+            raise KeyError(name)
+        return self.pool.item_at(slot)
+
+    def __iter__(self):
+        """Iterate over the item names in slot order."""
+        for item in self.pool.iter_items():
+            yield item.name
+
+
+class SQLiteItemPool(ItemPool):
+    """This class represents a pool of items stored in a SQLite file.
+
+    Writes go through one connection, each in an immediate transaction
+    so that writers in other processes wait for it; reads go through a
+    ConnectionPool of read-only connections. The sorted name index and
+    the layout only follow the changes made through this object."""
+    def __init__(self, path, items=None, readers=READERS):
+        self.path = path
+        self._writer = connect(path)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('PRAGMA synchronous=NORMAL')
+        self._writer.execute(SCHEMA)
+        self._lock = threading.Lock()
+        self.readers = ConnectionPool(path, readers)
+        self._view = SQLiteItems(self)
+        super().__init__(items)
+
+    @property
+    def items(self):
+        """Return a read-only name to Item mapping of the pool."""
+        return self._view
+
+    @contextmanager
+    def _transaction(self):
+        """Run a write transaction, holding the database write lock."""
+        with self._lock:
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute('ROLLBACK')
+                raise
+            self._writer.execute('COMMIT')
+
+    @staticmethod
+    def _size(conn):
+        """Return the number of rows, from the largest slot."""
+        last, = conn.execute(SELECT_SIZE).fetchone()
+        return 0 if last is None else last + 1
+
+    def _load(self, items):
+        """Insert an already validated items dictionary."""
+        if items:
+            self.add_validated((None, item.name, item.cents)
+                               for item in items.values())
+
+    def _store(self, item):
+        """Insert an already validated item in a new slot."""
+        self._insert([(item.name, item.cents)])
+
+    def _insert(self, rows):
+        """Insert (name, cents) rows after the last slot in one
+        transaction, raise DuplicateItemError if a name is taken."""
+        try:
+            with self._transaction() as conn:
+                size = self._size(conn)
+                conn.executemany(INSERT_ITEM,
+                                 ((size + i, name, cents)
+                                  for i, (name, cents) in enumerate(rows)))
+        except sqlite3.IntegrityError:
+            raise DuplicateItemError() from None
+
+    def add_validated(self, valid):
+        """Add the items of (row, name, cents) records known to be valid
+        and new to the pool with one batched insert (see
+        ItemPool.add_validated)."""
+        if debug.DEBUG:
+            super().add_validated(valid)
+            return
+        rows = [(name, cents) for _, name, cents in valid]
+        self._insert(rows)
+        if any(index is not None for index in
+               (self._sorted_names, self._trie, self._ngrams,
+                self._layout, self._sampler, self.log)):
+            for name, cents in rows:
+                self._added(Item.trusted(name, cents))
+
+    def _discard(self, item_name):
+        """Delete an item known to be in the pool, moving the last row
+        into its slot."""
+        with self._transaction() as conn:
+            slot, = conn.execute(SELECT_SLOT, (item_name,)).fetchone()
+            last = self._size(conn) - 1
+            conn.execute(DELETE_ITEM, (slot,))
+            if slot != last:
+                conn.execute(MOVE_ITEM, (slot, last))
+
+    def slot_of(self, item_name):
+        """Return the slot of the named item, or -1 if it is missing."""
+        if not isinstance(item_name, str):
+            return -1
+        with self.readers.connection() as conn:
+            row = conn.execute(SELECT_SLOT, (item_name,)).fetchone()
+        return -1 if row is None else row[0]
+
+    def name_at(self, slot):
+        """Return the name of the item in the given slot."""
+        return self.item_at(slot).name
+
+    def item_at(self, slot):
+        """Return the Item in the given slot."""
+        with self.readers.connection() as conn:
+            row = conn.execute(SELECT_ITEM, (slot,)).fetchone()
+        if row is None:
+            raise IndexError(slot)
+        return Item.trusted(*row)
+
+    def items_at(self, slots):
+        """Return the Items in the given slots, in the same order, with
+        one query per LOOKUP_BATCH slots."""
+        found = {}
+        with self.readers.connection() as conn:
+            for size, batch in padded_batches(list(slots)):
+                for slot, name, cents in conn.execute(SELECT_SLOTS_IN[size],
+                                                      batch):
+                    found[slot] = Item.trusted(name, cents)
+        return [found[slot] for slot in slots]
+
+    def _known(self, names):
+        """Return the set of names already in the pool, with one query
+        per LOOKUP_BATCH names."""
+        names = [name for name in names if isinstance(name, str)]
+        known = set()
+        with self.readers.connection() as conn:
+            for size, batch in padded_batches(names):
+                known.update(name for (name,) in
+                             conn.execute(SELECT_NAMES_IN[size], batch))
+        return known
+
+    def iter_items(self):
+        """Iterate over the items of the pool in slot order, reading
+        SCAN_BATCH rows at a time.
+
+        Each page is read with a connection borrowed for that page only.
+        Rows moved by writes between two pages may be skipped or seen
+        twice."""
+        slot = 0
+        while True:
+            with self.readers.connection() as conn:
+                rows = conn.execute(SCAN_ITEMS, (slot, SCAN_BATCH)).fetchall()
+            for _, name, cents in rows:
+                yield Item.trusted(name, cents)
+            if len(rows) < SCAN_BATCH:
+                return
+            slot = rows[-1][0] + 1
+
+    def price_column(self):
+        """Return a copy of the item prices in cents, in slot order."""
+        with self.readers.connection() as conn:
+            return array('q', [cents for (cents,) in
+                               conn.execute(SELECT_PRICES)])
+
+    def get_size(self):
+        """Return the size of the pool."""
+        with self.readers.connection() as conn:
+            return self._size(conn)
+
+    def sample_items(self, sample_size, rng=random, weighted=False):
+        """Return a sample of items from the pool (see
+        ItemPool.sample_items), reading only the sampled rows."""
+        if weighted:
+            return super().sample_items(sample_size, rng, weighted)
+        size = self.get_size()
+        return self.items_at(rng.sample(range(size),
+                                        min(sample_size, size)))
+
+    def close(self):
+        """Close the connections to the database."""
+        self.readers.close()
+        self._writer.close()
+
+    def __reduce__(self):
+        """Return how to pickle the pool: the copy opens the same
+        database file."""
+        return SQLiteItemPool, (self.path,)
+
+    def __repr__(self):
+        """Return the string representation of the pool."""
+        return f'SQLiteItemPool({self.path!r}, {self.get_size()} items)'
@@ -0,0 +1,178 @@
+"""This module contains the ItemPoolStore class.
+
+A store is a directory of numbered snapshots and mutation log
+segments: snapshot-n holds the pool as it was before the records of
+log-n. The pool is recovered by opening the latest snapshot and
+replaying only the segments from its number on.
+
+New snapshots are built in a worker process from the previous snapshot
+and the segments written since, so the live pool is neither copied nor
+locked: add and remove only wait for the log to switch to a new
+segment. Once a snapshot is on disk, the files it replaces are
+removed."""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from shoppinglistapp.core.items import ItemPool
+from shoppinglistapp.core.snapshot import SnapshotItemPool, write_snapshot
+from shoppinglistapp.core.wal import MutationLog, replay_log
+
+SNAPSHOT = 'snapshot'
+LOG = 'log'
+# seconds between the checks for changes to snapshot
+SNAPSHOT_INTERVAL = 60.0
+
+
+def store_path(directory, kind, number):
+    """Return the path of the number-th file of a kind in directory."""
+    return os.path.join(directory, f'{kind}-{number:08d}')
+
+
+def store_numbers(directory, kind):
+    """Return the sorted numbers of the files of a kind in directory."""
+    numbers = []
+    for name in os.listdir(directory):
+        prefix, _, number = name.partition('-')
+        if prefix == kind and number.isdigit():
+            numbers.append(int(number))
+    return sorted(numbers)
+
+
+def compact(directory, base, stop):
+    """Write snapshot stop of the store in directory from snapshot base,
+    or from an empty pool if base is 0, and log segments base to
+    stop - 1."""
+    if base:
+        item_pool = SnapshotItemPool(store_path(directory, SNAPSHOT, base),
+                                     writable=True)
+    else:
+        item_pool = ItemPool()
+    for number in range(base, stop):
+        replay_log(item_pool, store_path(directory, LOG, number))
+    write_snapshot(item_pool, store_path(directory, SNAPSHOT, stop))
+    if base:
+        item_pool.close()
+
+
+def sync_directory(directory):
+    """Make the renames and removals in directory durable, where the
+    platform allows it."""
+    if os.name == 'posix':
+        descriptor = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+class ItemPoolStore:
+    """This class represents a directory from which an item pool is
+    recovered and to which its changes are logged, with a snapshot
+    taken every snapshot_interval seconds if the pool changed.
+
+    The other options are passed on to MutationLog. The pauses of add
+    and remove caused by the snapshots are kept in pauses, in
+    seconds."""
+    def __init__(self, directory, snapshot_interval=SNAPSHOT_INTERVAL,
+                 **options):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.pauses = []
+        self.item_pool = None
+        self.log = None
+        self._options = options
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._snapshot = self._mapped = None
+        self._segment = None
+        self._logged = None
+
+    def open(self):
+        """Recover the pool, log its changes from now on and start the
+        periodic snapshots. Return the pool.
+
+        A recovered pool is a writable SnapshotItemPool over the latest
+        snapshot, or an ItemPool if there is none yet."""
+        snapshots = store_numbers(self.directory, SNAPSHOT)
+        base = snapshots[-1] if snapshots else 0
+        if base:
+            item_pool = SnapshotItemPool(
+                store_path(self.directory, SNAPSHOT, base), writable=True)
+        else:
+            item_pool = ItemPool()
+        segments = [number for number in store_numbers(self.directory, LOG)
+                    if number >= base]
+        for number in segments:
+            replay_log(item_pool, store_path(self.directory, LOG, number))
+        self._snapshot = self._mapped = base
+        self._segment = segments[-1] + 1 if segments else base
+        self._remove_before(base)
+        self.log = MutationLog(
+            store_path(self.directory, LOG, self._segment), **self._options)
+        self._logged = 0
+        item_pool.log = self.log
+        self.item_pool = item_pool
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return item_pool
+
+    def snapshot(self):
+        """Write a snapshot of the pool as of now and remove the files
+        it replaces. Return how long add and remove were blocked."""
+        self._check_open()
+        with self._lock:
+            logged = self.log.records
+            stop = self._segment + 1
+            pause = self.log.rotate(store_path(self.directory, LOG, stop))
+            self.pauses.append(pause)
+            self._segment = stop
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    1, mp_context=get_context('spawn'))
+            self._executor.submit(compact, self.directory, self._snapshot,
+                                  stop).result()
+            sync_directory(self.directory)
+            self._snapshot = stop
+            self._logged = logged
+            self._remove_before(stop)
+            return pause
+
+    def _check_open(self):
+        """Raise ValueError if the store has not been opened."""
+        if self.log is None:
+            raise ValueError('The store is not open.')
+
+    def _remove_before(self, number):
+        """Remove the snapshots and log segments older than number, but
+        the snapshot mapped by the live pool."""
+        for kind in (SNAPSHOT, LOG):
+            for old in store_numbers(self.directory, kind):
+                if old < number and (kind, old) != (SNAPSHOT, self._mapped):
+                    os.remove(store_path(self.directory, kind, old))
+        for name in os.listdir(self.directory):
+            if name.endswith('.partial'):
+                os.remove(os.path.join(self.directory, name))
+
+    def _run(self):
+        """Take a snapshot every snapshot_interval seconds if the pool
+        changed, until the store is closed."""
+        while not self._stopped.wait(self.snapshot_interval):
+            if self.log.records != self._logged:
+                self.snapshot()
+
+    def close(self):
+        """Stop the snapshots and close the log. The pool stays usable
+        but its changes are no longer logged."""
+        self._check_open()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.item_pool.log = None
+        self.log.close()
+        if self._executor is not None:
+            self._executor.shutdown()
@@ -0,0 +1,120 @@
+"""This module contains the bulk validation of catalog records.
+
+Checking a batch of records raises nothing: every rejected row is
+kept in a ValidationReport as its row number, an error code and the
+offending value. The exception and its message are only built when
+they are asked for, so batches with many bad rows stay cheap. The
+exception classes of shoppinglistapp.core.errors remain the
+single-item path."""
+from array import array
+
+from shoppinglistapp.core.errors import InvalidItemNameError,\
+    InvalidItemPriceError, DuplicateItemError, InvalidRecordError
+from shoppinglistapp.core.money import MAX_CENTS, to_cents
+
+# error codes
+NAME_NOT_STRING = 1
+NAME_EMPTY = 2
+PRICE_INVALID = 3
+DUPLICATE = 4
+RECORD_INVALID = 5
+
+
+def make_error(code, value):
+    """Return the exception matching an error code and its value."""
+    if code in (NAME_NOT_STRING, NAME_EMPTY):
+        return InvalidItemNameError(value)
+    if code == PRICE_INVALID:
+        return InvalidItemPriceError(value)
+    if code == DUPLICATE:
+        return DuplicateItemError()
+    if code == RECORD_INVALID:
+        return InvalidRecordError(value)
+    raise ValueError(f'Unknown error code {code}.')
+
+
+class ValidationReport:
+    """This class represents the rejected rows of a batch of records.
+
+    Rows and codes are kept in typed arrays; the offending values are
+    kept as they are, unformatted."""
+    def __init__(self):
+        self.rows = array('q')
+        self.codes = array('B')
+        self.values = []
+
+    def reject(self, row, code, value):
+        """Record a rejected row."""
+        self.rows.append(row)
+        self.codes.append(code)
+        self.values.append(value)
+
+    def clear(self):
+        """Forget the rejected rows."""
+        del self.rows[:], self.codes[:], self.values[:]
+
+    def __len__(self):
+        """Return the number of rejected rows."""
+        return len(self.rows)
+
+    def __iter__(self):
+        """Iterate over the (row, code, value) of the rejected rows."""
+        return zip(self.rows, self.codes, self.values)
+
+    def error(self, index):
+        """Return the exception of the index-th rejected row."""
+        return make_error(self.codes[index], self.values[index])
+
+    def messages(self):
+        """Yield the message of every rejected row."""
+        for index, row in enumerate(self.rows):
+            yield f'Row {row}: {self.error(index)}'
+
+
+def validate_records(records, known=()):
+    """Check a batch of (row, name, price) records as add_item would,
+    parsing price strings. Names in known and names repeated in the
+    batch are duplicates.
+
+    Return the (row, name, cents) of the valid records and the
+    ValidationReport of the others."""
+    valid = []
+    report = ValidationReport()
+    seen = set()
+    for row, name, price in records:
+        if not isinstance(name, str):
+            report.reject(row, NAME_NOT_STRING, name)
+            continue
+        if not name:
+            report.reject(row, NAME_EMPTY, name)
+            continue
+        if isinstance(price, str):
+            try:
+                price = float(price)
+            except ValueError:
+                report.reject(row, PRICE_INVALID, price)
+                continue
+        if (not isinstance(price, (float, int)) or isinstance(price, bool)
+                or not price > 0):
+            report.reject(row, PRICE_INVALID, price)
+            continue
+        try:
+            cents = to_cents(price)
+        except OverflowError:
+            cents = 0
+        if not 0 < cents <= MAX_CENTS:
+            report.reject(row, PRICE_INVALID, price)
+            continue
+        if name in seen or name in known:
+            report.reject(row, DUPLICATE, name)
+            continue
+        seen.add(name)
+        valid.append((row, name, cents))
+    return valid, report
+
+
+def validate_items(pairs, known=()):
+    """Check a batch of (name, price) pairs, counting rows from 0
+    (see validate_records)."""
+    return validate_records(((row, name, price) for row, (name, price)
+                             in enumerate(pairs)), known)
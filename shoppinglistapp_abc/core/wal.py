@@ -0,0 +1,216 @@
+"""This module contains the MutationLog class and the replay of item
+pool mutation logs.
+
+A log is a sequence of binary records, one per item added to or
+removed from a pool. Each record starts with the CRC-32 of the rest of
+the record, so a record torn by a crash in the middle of a write is
+recognised and cut off when the log is replayed."""
+import os
+import struct
+import threading
+import time
+import zlib
+
+from shoppinglistapp.core.items import LOAD_BATCH
+
+# crc, then the body: operation, cents, name length
+HEADER = struct.Struct('<IBqI')
+CRC = struct.Struct('<I')
+BODY = struct.Struct('<BqI')
+ADD = 1
+REMOVE = 2
+# records pending before the log is synced
+SYNC_RECORDS = 1024
+# seconds before pending records are synced
+SYNC_INTERVAL = 0.01
+READ_BYTES = 1 << 20
+
+
+def pack_record(operation, name, cents=0):
+    """Return the bytes of a log record."""
+    key = name.encode()
+    body = BODY.pack(operation, cents, len(key)) + key
+    return CRC.pack(zlib.crc32(body)) + body
+
+
+def iter_records(stream):
+    """Yield the (end offset, operation, name, cents) of the records
+    read from a binary stream, up to the first torn or corrupt one."""
+    buffer = b''
+    base = 0
+    while True:
+        chunk = stream.read(READ_BYTES)
+        if not chunk:
+            return
+        buffer += chunk
+        view = memoryview(buffer)
+        pos = 0
+        while pos + HEADER.size <= len(buffer):
+            crc, operation, cents, length = HEADER.unpack_from(buffer, pos)
+            end = pos + HEADER.size + length
+            if end > len(buffer):
+                break
+            if (zlib.crc32(view[pos + 4:end]) != crc
+                    or operation not in (ADD, REMOVE)):
+                return
+            yield (base + end, operation,
+                   str(view[pos + HEADER.size:end], 'utf-8'), cents)
+            pos = end
+        view.release()
+        base += pos
+        buffer = buffer[pos:]
+
+
+def replay_log(item_pool, path):
+    """Apply the records of the log at path to the item pool and return
+    their number.
+
+    The log must have been written from a pool in the state item_pool
+    is in. A torn or corrupt tail is cut off the file."""
+    try:
+        stream = open(path, 'r+b')
+    except FileNotFoundError:
+        return 0
+    with stream:
+        count = end = 0
+        added = []
+        for end, operation, name, cents in iter_records(stream):
+            if operation == ADD:
+                added.append((None, name, cents))
+                if len(added) == LOAD_BATCH:
+                    item_pool.add_validated(added)
+                    added.clear()
+            else:
+                if added:
+                    item_pool.add_validated(added)
+                    added.clear()
+                item_pool.remove_item(name)
+            count += 1
+        item_pool.add_validated(added)
+        stream.truncate(end)
+    return count
+
+
+def open_log(item_pool, path, **options):
+    """Replay the log at path into the item pool, then attach a
+    MutationLog appending to it and return the log.
+
+    The options are passed on to MutationLog."""
+    item_pool.log = None
+    replay_log(item_pool, path)
+    item_pool.log = MutationLog(path, **options)
+    return item_pool.log
+
+
+class MutationLog:
+    """This class represents an append-only log of item pool mutations
+    with group commit.
+
+    Appending a record only buffers it. A background thread writes and
+    fsyncs the buffered records once sync_records of them are pending
+    or sync_interval seconds have passed, so a crash loses at most the
+    last group. A failed write is raised by the next append."""
+    def __init__(self, path, sync_records=SYNC_RECORDS,
+                 sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.sync_records = sync_records
+        self.sync_interval = sync_interval
+        self.syncs = 0
+        self.records = 0
+        self._file = open(path, 'ab')
+        self._buffer = bytearray()
+        self._pending = 0
+        self._closed = False
+        self._error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log_add(self, item):
+        """Append the addition of an item."""
+        self._append(pack_record(ADD, item.name, item.cents))
+
+    def log_remove(self, item_name):
+        """Append the removal of the named item."""
+        self._append(pack_record(REMOVE, item_name))
+
+    def _append(self, record):
+        """Buffer a record, waking the writer when a group starts or is
+        full."""
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise ValueError('The mutation log is closed.')
+            self._buffer += record
+            self._pending += 1
+            self.records += 1
+            if self._pending in (1, self.sync_records):
+                self._wake.notify()
+
+    def flush(self):
+        """Write and fsync the buffered records now."""
+        with self._io_lock:
+            with self._lock:
+                data, self._buffer = self._buffer, bytearray()
+                self._pending = 0
+            if data:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.syncs += 1
+
+    def rotate(self, path):
+        """Append the next records to the file at path instead, and
+        return once the records of the previous file are synced.
+
+        Return how long appends were blocked, in seconds."""
+        new_file = open(path, 'ab')
+        with self._io_lock:
+            with self._lock:
+                start = time.perf_counter()
+                data, self._buffer = self._buffer, bytearray()
+                self._pending = 0
+                old_file, self._file = self._file, new_file
+                self.path = path
+                pause = time.perf_counter() - start
+            if data:
+                old_file.write(data)
+                old_file.flush()
+                os.fsync(old_file.fileno())
+                self.syncs += 1
+            old_file.close()
+        return pause
+
+    def _run(self):
+        """Sync the buffered records group by group until closed."""
+        while True:
+            with self._lock:
+                self._wake.wait_for(lambda: self._closed or self._pending)
+                self._wake.wait_for(
+                    lambda: (self._closed
+                             or self._pending >= self.sync_records),
+                    self.sync_interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except OSError as error:
+                with self._lock:
+                    self._error = error
+                return
+            if closed:
+                return
+
+    def close(self):
+        """Sync the buffered records and close the log."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error